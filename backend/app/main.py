@@ -1,59 +1,96 @@
-import json
+import asyncio
+import functools
+import logging
 import os
+import queue
 import sqlite3
-from fastapi import FastAPI, HTTPException
+import threading
+from collections import OrderedDict, defaultdict
+from contextlib import contextmanager
+import orjson
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware  # Import CORS
 from pydantic import BaseModel
 from typing import Optional, Any, List
 from dotenv import load_dotenv
 
+# Unlike per-request print() calls, the logging module buffers through
+# handlers and can be filtered/redirected per deployment.
+logger = logging.getLogger(__name__)
+
 # --- Agent Imports ---
-# Load environment variables (for HOLISTIC_AI_TEAM_ID, etc.)
-load_dotenv()
+# Load environment variables (for HOLISTIC_AI_TEAM_ID, etc.) — but skip the
+# filesystem walk entirely when the environment is already configured, e.g.
+# when docker-compose injects the variables via env_file.
+if not os.environ.get("HOLISTIC_AI_TEAM_ID"):
+    load_dotenv()
 
 try:
     # These imports are based on your simple_usage.py and file structure
-    from app.scripts.ingestion import ingest_dict
+    from app.scripts.ingestion import ingest_dict_async
     from app.scripts.create_db import DB_PATH
-    from observability_agent import build_graph, run_obs_agent
+    from observability_agent import build_graph, arun_obs_agent
     from observability_agent.holistic_ai_bedrock import get_chat_model
     from observability_agent.core.state import ObsState  # Assuming this is a TypedDict
     from langchain_core.messages import messages_to_dict, messages_from_dict
 
     AGENT_IMPORTS_SUCCESS = True
 except ImportError as e:
-    print(f"❌ Error: Failed to import agent modules: {e}")
-    print("Agent endpoints will not be available.")
+    logger.error("Failed to import agent modules: %s; agent endpoints will not be available.", e)
     AGENT_IMPORTS_SUCCESS = False
 
 
-# --- Initialize Agent (run once on startup) ---
+# --- Agent Initialization (lazy, async-locked singleton) ---
+# Building the Bedrock model + LangGraph at import time blocked every uvicorn
+# worker (and --reload cycle) on Bedrock init. Instead the agent is built once
+# on first use behind an asyncio.Lock; a startup hook warms it in the
+# background so the first real query usually finds it ready.
 llm = None
 agent_app = None
-if AGENT_IMPORTS_SUCCESS:
-    try:
-        print("🚀 Initializing Holistic AI Bedrock model...")
-        llm = get_chat_model()
-        print("✅ Model initialized.")
-        print("🚀 Building LangGraph agent...")
-        agent_app = build_graph(llm)
-        print("✅ Agent graph built and compiled.")
-    except Exception as e:
-        print(f"❌❌❌ FAILED TO INITIALIZE AGENT: {e}")
-        print("Agent will not be available. Check .env file and dependencies.")
-else:
-    print("Skipping agent initialization due to import errors.")
+_agent_init_lock: Optional[asyncio.Lock] = None
+
+
+async def _get_agent_app():
+    """Return the compiled agent graph, building it on first call."""
+    global llm, agent_app, _agent_init_lock
+    if agent_app is not None or not AGENT_IMPORTS_SUCCESS:
+        return agent_app
+
+    if _agent_init_lock is None:
+        _agent_init_lock = asyncio.Lock()
+
+    async with _agent_init_lock:
+        if agent_app is None:
+            try:
+                logger.info("Initializing Holistic AI Bedrock model...")
+                llm = await asyncio.to_thread(get_chat_model)
+                logger.info("Model initialized; building LangGraph agent...")
+                agent_app = await asyncio.to_thread(build_graph, llm)
+                logger.info("Agent graph built and compiled.")
+            except Exception as e:
+                logger.error(
+                    "Failed to initialize agent: %s. Check .env file and dependencies.", e
+                )
+    return agent_app
 
 
 # 1. Initialize the FastAPI app
 app = FastAPI()
 
 # --- Add CORS Middleware ---
+# Concrete origin/method lists keep Starlette on its cheap exact-match path
+# (no wildcard/regex work per request). add_middleware prepends, so CORS sits
+# outermost and OPTIONS preflights short-circuit before anything else runs.
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],  # Allows all origins
+    allow_origins=[
+        "http://localhost",  # nginx frontend
+        "http://localhost:3000",
+        "http://localhost:5173",  # vite dev server
+    ],
     allow_credentials=True,
-    allow_methods=["*"],  # Allows all methods
+    allow_methods=["GET", "POST", "OPTIONS"],
     allow_headers=["*"],  # Allows all headers
 )
 
@@ -63,6 +100,32 @@ class AgentQuery(BaseModel):
     user_message: str
     # prev_state will be a JSON-serializable dict
     prev_state: Optional[dict] = None
+    # Optional session key: lets the server reuse the live ObsState between
+    # turns instead of re-inflating prev_state from JSON on every call.
+    session_id: Optional[str] = None
+
+
+# --- Session State Cache ---
+# Bounded LRU of live ObsState objects keyed by session_id. A hit skips the
+# messages_from_dict pass over the whole chat history (stdlib OrderedDict is
+# enough here; no need for an extra cache dependency).
+STATE_CACHE_SIZE = 1024
+
+_STATE_CACHE: "OrderedDict[str, Any]" = OrderedDict()
+
+
+def _state_cache_get(session_id: str):
+    state = _STATE_CACHE.get(session_id)
+    if state is not None:
+        _STATE_CACHE.move_to_end(session_id)
+    return state
+
+
+def _state_cache_put(session_id: str, state) -> None:
+    _STATE_CACHE[session_id] = state
+    _STATE_CACHE.move_to_end(session_id)
+    while len(_STATE_CACHE) > STATE_CACHE_SIZE:
+        _STATE_CACHE.popitem(last=False)
 
 
 # --- NEW: State Serialization Helpers ---
@@ -78,7 +141,7 @@ def serialize_state(state: ObsState) -> Optional[dict]:
             serializable_state["messages"] = messages_to_dict(state["messages"])
         return serializable_state
     except Exception as e:
-        print(f"Error serializing state: {e}")
+        logger.warning("Error serializing state: %s", e)
         return state  # Return best-effort
 
 
@@ -104,7 +167,7 @@ def deserialize_state(state_dict: Optional[dict]) -> Optional[ObsState]:
 
         return deserialized_state
     except Exception as e:
-        print(f"Error deserializing state messages: {e}")
+        logger.warning("Error deserializing state messages: %s", e)
         # Fallback: if deserialization fails, treat as new session
         return None
 
@@ -115,25 +178,252 @@ def _load_json_fields(row_dict: dict, fields_to_parse: list) -> dict:
     if not row_dict:
         return row_dict
     for field in fields_to_parse:
-        if field in row_dict and isinstance(row_dict[field], str):
+        value = row_dict.get(field)
+        # Cheap first-character guard: only attempt a parse when the text can
+        # actually be a JSON document, so plain strings skip the loads call
+        # and its exception machinery entirely.
+        if isinstance(value, str) and value[:1] in '{["0123456789-tfn':
             try:
-                row_dict[field] = json.loads(row_dict[field])
-            except json.JSONDecodeError:
+                row_dict[field] = orjson.loads(value)
+            except orjson.JSONDecodeError:
                 pass
     return row_dict
 
 
-# --- Database Connection Helper ---
-def get_db_conn():
-    """Establishes a connection to the SQLite database."""
-    if not os.path.exists(DB_PATH):
-        print(f"Warning: Database file not found at {DB_PATH}. Agent queries may fail.")
-        # raise HTTPException(status_code=500, detail=f"Database file not found at {DB_PATH}")
-    conn = sqlite3.connect(DB_PATH)
+# --- Step Table Layout ---
+# All three step tables share the same leading columns; the per-type columns
+# are disjoint. We fetch every step for a run with a single UNION ALL query
+# (NULL-padding the other tables' columns so the arms align) instead of three
+# separate round trips, then project each row back down to its own columns.
+_STEP_COMMON_COLUMNS = [
+    "step_id",
+    "run_id",
+    "step_index",
+    "previous_step_id",
+    "start_time",
+    "end_time",
+]
+
+# run_type -> (table, type-specific columns, JSON columns, (name column, fallback name))
+_STEP_TABLES = {
+    "llm": (
+        "call_model",
+        [
+            "prompt_text",
+            "llm_output_text",
+            "llm_input_tokens",
+            "llm_output_tokens",
+            "llm_total_tokens",
+            "llm_prompt_cost",
+            "llm_completion_cost",
+            "llm_total_cost",
+            "finish_reason",
+            "model_name",
+            "model_provider",
+            "tool_call_requests",
+        ],
+        ["tool_call_requests"],
+        ("model_name", "llm_step"),
+    ),
+    "tool": (
+        "call_tool",
+        [
+            "tool_name",
+            "tool_args",
+            "tool_status",
+            "tool_response",
+            "tool_message_content",
+            "tool_cost",
+            "tool_latency_ms",
+        ],
+        ["tool_args"],
+        ("tool_name", "tool_step"),
+    ),
+    "chain": (
+        "call_chain",
+        [
+            "chain_name",
+            "chain_status",
+            "chain_input_messages",
+            "chain_output_messages",
+            "chain_prompt_tokens",
+            "chain_completion_tokens",
+            "chain_total_tokens",
+            "chain_prompt_cost",
+            "chain_completion_cost",
+            "chain_total_cost",
+        ],
+        ["chain_input_messages", "chain_output_messages"],
+        ("chain_name", "chain_step"),
+    ),
+}
+
+
+def _build_step_union_sql(exclude_root: bool) -> str:
+    """Build the UNION ALL query over the three step tables."""
+    all_specific = [col for _, cols, _, _ in _STEP_TABLES.values() for col in cols]
+    where = "run_id = ?" + (" AND step_id != ?" if exclude_root else "")
+    arms = []
+    for run_type, (table, cols, _, _) in _STEP_TABLES.items():
+        own = set(cols)
+        projected = ", ".join(col if col in own else f"NULL AS {col}" for col in all_specific)
+        arms.append(
+            f"SELECT '{run_type}' AS run_type, {', '.join(_STEP_COMMON_COLUMNS)}, {projected} "
+            f"FROM {table} WHERE {where}"
+        )
+    return " UNION ALL ".join(arms)
+
+
+_STEPS_UNION_SQL = _build_step_union_sql(exclude_root=False)
+_STEPS_UNION_SQL_NO_ROOT = _build_step_union_sql(exclude_root=True)
+
+# Module-level SQL constants: SQLite's per-connection statement cache is keyed
+# by the query string, so passing the same string object every call lets the
+# pooled connections reuse already-prepared statements.
+_SQL_AGENT_RUN = "SELECT * FROM agent_runs WHERE run_id = ?"
+_SQL_TRACES_LIST = (
+    "SELECT run_id, name, start_time, end_time, status, total_cost, total_tokens, "
+    "input_messages, output_messages FROM agent_runs ORDER BY start_time DESC"
+)
+_TRACES_LIST_KEYS = (
+    "run_id",
+    "name",
+    "start_time",
+    "end_time",
+    "status",
+    "total_cost",
+    "total_tokens",
+    "input_messages",
+    "output_messages",
+)
+
+
+def _stream_nested_tree(root: dict):
+    """Incrementally encode a nested trace tree: root header first, then children."""
+    children = root.pop("children", [])
+    head = orjson.dumps(root)
+    # Re-open the root object and append the children array one child at a time.
+    yield head[:-1] + b',"children":['
+    for idx, child in enumerate(children):
+        if idx:
+            yield b","
+        yield orjson.dumps(child)
+    yield b"]}"
+
+
+# Precomputed (key, row index) layout per run_type. The UNION ALL column
+# order is fixed (run_type, common columns, all specific columns), so each
+# step dict can be built with O(1) integer indexing into the sqlite3.Row
+# instead of per-key string lookups.
+def _build_step_row_layouts() -> dict:
+    all_specific = [col for _, cols, _, _ in _STEP_TABLES.values() for col in cols]
+    base = 1 + len(_STEP_COMMON_COLUMNS)
+    layouts = {}
+    for run_type, (_, cols, _, _) in _STEP_TABLES.items():
+        own = set(cols)
+        layout = [(col, 1 + i) for i, col in enumerate(_STEP_COMMON_COLUMNS)]
+        layout += [(col, base + i) for i, col in enumerate(all_specific) if col in own]
+        layouts[run_type] = tuple(layout)
+    return layouts
+
+
+_STEP_ROW_LAYOUTS = _build_step_row_layouts()
+
+
+def _step_row_to_dict(row: sqlite3.Row) -> dict:
+    """Project a UNION ALL row down to its own table's columns and decorate it."""
+    run_type = row[0]
+    _, _, json_fields, (name_field, fallback_name) = _STEP_TABLES[run_type]
+    step = {col: row[i] for col, i in _STEP_ROW_LAYOUTS[run_type]}
+    step = _load_json_fields(step, json_fields)
+    step["run_type"] = run_type
+    step["name"] = step.get(name_field) or fallback_name
+    return step
+
+
+# --- Database Connection Pool ---
+# Opening a fresh SQLite connection per request re-parses the schema and runs
+# with the default (slow) PRAGMAs. We keep a small pool of long-lived,
+# PRAGMA-tuned connections instead; LIFO keeps hot connections (and their
+# page caches) in rotation.
+POOL_SIZE = 8
+
+# Rows fetched per fetchmany() batch on the trace endpoints.
+FETCH_BATCH_SIZE = 256
+
+_POOL: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue(maxsize=POOL_SIZE)
+
+_CONNECTION_PRAGMAS = """
+PRAGMA journal_mode=WAL;
+PRAGMA synchronous=NORMAL;
+PRAGMA temp_store=memory;
+PRAGMA cache_size=-64000;
+PRAGMA mmap_size=268435456;
+PRAGMA cache_spill=OFF;
+"""
+
+
+def _open_pooled_connection() -> sqlite3.Connection:
+    conn = sqlite3.connect(DB_PATH, check_same_thread=False, isolation_level=None)
     conn.row_factory = sqlite3.Row
+    conn.set_trace_callback(None)
+    conn.executescript(_CONNECTION_PRAGMAS)
     return conn
 
 
+@app.on_event("startup")
+async def warm_agent():
+    """Kick off agent initialization without blocking server startup."""
+    if AGENT_IMPORTS_SUCCESS:
+        asyncio.create_task(_get_agent_app())
+
+
+@app.on_event("startup")
+def init_db_pool():
+    """Open the connection pool once, when the server starts."""
+    if not os.path.exists(DB_PATH):
+        logger.warning("Database file not found at %s. Agent queries may fail.", DB_PATH)
+        # raise HTTPException(status_code=500, detail=f"Database file not found at {DB_PATH}")
+    for _ in range(POOL_SIZE):
+        _POOL.put(_open_pooled_connection())
+
+
+@contextmanager
+def get_db_conn():
+    """Borrow a pooled SQLite connection, returning it to the pool on exit."""
+    conn = _POOL.get()
+    try:
+        yield conn
+    finally:
+        _POOL.put(conn)
+
+
+# data_version is a per-connection counter that increments whenever another
+# connection commits — including WAL commits that have not yet been
+# checkpointed into the main database file, whose mtime therefore cannot be
+# used to invalidate caches. The counter is only comparable within one
+# connection, so the stamp comes from a dedicated long-lived connection
+# rather than a borrowed pool one.
+_STAMP_CONN: Optional[sqlite3.Connection] = None
+_STAMP_LOCK = threading.Lock()
+
+
+def _db_stamp() -> int:
+    """Return a stamp that changes on every commit to the database."""
+    global _STAMP_CONN
+    with _STAMP_LOCK:
+        try:
+            if _STAMP_CONN is None:
+                _STAMP_CONN = sqlite3.connect(
+                    f"file:{DB_PATH}?mode=ro", uri=True, check_same_thread=False
+                )
+            return _STAMP_CONN.execute("PRAGMA data_version").fetchone()[0]
+        except sqlite3.Error:
+            # Mirrors the old missing-file fallback: serve uncached-but-correct
+            # rather than failing the request over the stamp.
+            return 0
+
+
 # --- NEW: Agent Query Endpoint ---
 @app.post("/query_agent")
 async def query_agent(query: AgentQuery):
@@ -141,30 +431,41 @@ async def query_agent(query: AgentQuery):
     Runs the observability agent with a user's query,
     supporting multi-turn conversations.
     """
-    if not agent_app or not AGENT_IMPORTS_SUCCESS:
+    agent = await _get_agent_app()
+    if not agent:
         raise HTTPException(
             status_code=503, detail="Agent is not initialized. Check server logs for errors."
         )
 
     try:
-        # 1. Deserialize the previous state from JSON
-        deserialized_prev_state = deserialize_state(query.prev_state)
+        # 1. Reuse the cached live state for this session if we have one;
+        # otherwise deserialize the previous state from JSON.
+        deserialized_prev_state = None
+        if query.session_id:
+            deserialized_prev_state = _state_cache_get(query.session_id)
+        if deserialized_prev_state is None:
+            deserialized_prev_state = deserialize_state(query.prev_state)
 
         # 2. Run the agent
-        print(f"Running agent with message: {query.user_message}")
-        final_state: ObsState = run_obs_agent(
-            user_message=query.user_message, app=agent_app, prev_state=deserialized_prev_state
+        logger.info("Running agent with message: %s", query.user_message)
+        final_state: ObsState = await arun_obs_agent(
+            user_message=query.user_message, app=agent, prev_state=deserialized_prev_state
         )
 
-        # 3. Serialize the final state before returning as JSON
+        if query.session_id:
+            _state_cache_put(query.session_id, final_state)
+
+        # 3. Serialize the final state before returning as JSON, bypassing
+        # FastAPI's per-field encoder walk.
         serializable_final_state = serialize_state(final_state)
 
-        return serializable_final_state
+        return Response(
+            content=orjson.dumps(serializable_final_state),
+            media_type="application/json",
+        )
 
     except Exception as e:
-        import traceback
-
-        traceback.print_exc()
+        logger.exception("Error processing agent query")
         raise HTTPException(status_code=500, detail=f"Error processing agent query: {e}")
 
 
@@ -173,14 +474,17 @@ async def query_agent(query: AgentQuery):
 async def handle_langsmith_trace(payload: dict):
     """
     Receives a trace from a LangSmith automation webhook
-    and ingest the dict to database
+    and ingest the dict to database.
+
+    Ingestion runs in a worker thread so a large trace payload does not
+    block the event loop for other requests.
     """
     try:
-        ingest_dict(payload)
-        print(f"✅ Successfully ingested trace to the database")
+        await ingest_dict_async(payload)
+        logger.info("Successfully ingested trace to the database")
         return {"status": "success", "message": "Trace ingested successfully"}
     except Exception as e:
-        print(f"❌ Error ingesting trace: {e}")
+        logger.error("Error ingesting trace: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -190,66 +494,104 @@ async def get_all_traces():
     """
     Retrieves a list of all agent runs (trace headers) for the sidebar.
     """
-    conn = None
+    def stream_traces():
+        # Hold the pooled connection only for as long as the stream runs;
+        # iterating the cursor directly keeps memory O(1) per row and
+        # overlaps SQLite page reads with the client send.
+        with get_db_conn() as conn:
+            cur = conn.cursor()
+
+            cur.execute(_SQL_TRACES_LIST)
+            cur.arraysize = FETCH_BATCH_SIZE
+
+            yield b"["
+            first = True
+            while rows := cur.fetchmany():
+                for row in rows:
+                    trace = dict(zip(_TRACES_LIST_KEYS, row))
+                    if not trace.get("name"):
+                        trace["name"] = trace["run_id"]
+                    if first:
+                        first = False
+                    else:
+                        yield b","
+                    # input_messages/output_messages stay raw JSON strings
+                    # (the frontend parses them itself).
+                    yield orjson.dumps(trace)
+            yield b"]"
+
     try:
-        conn = get_db_conn()
+        return StreamingResponse(stream_traces(), media_type="application/json")
+    except Exception as e:
+        logger.error("Error retrieving trace list: %s", e)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+# 4. Endpoint to retrieve a FULLY NESTED trace
+def _fetch_nested_trace_sync(trace_id: str) -> dict:
+    """Blocking DB work for /trace_nested: fetch the run and build the tree."""
+    with get_db_conn() as conn:
         cur = conn.cursor()
 
-        # --- MODIFIED QUERY ---
-        # Added end_time to the SELECT statement
-        cur.execute(
-            "SELECT run_id, name, start_time, end_time, status, total_cost, total_tokens, input_messages, output_messages FROM agent_runs ORDER BY start_time DESC"
-        )
-        # --- END MODIFICATION ---
+        cur.execute(_SQL_AGENT_RUN, (trace_id,))
+        agent_run_row = cur.fetchone()
 
-        rows = cur.fetchall()
+        if not agent_run_row:
+            raise HTTPException(
+                status_code=404, detail=f"Agent run with run_id '{trace_id}' not found."
+            )
 
-        traces = []
-        for row in rows:
-            trace = dict(row)
-            if not trace.get("name"):
-                trace["name"] = trace["run_id"]
-            traces.append(trace)
+        cur.arraysize = FETCH_BATCH_SIZE
+        cur.execute(_STEPS_UNION_SQL_NO_ROOT, (trace_id,) * 6)
+        all_steps = []
+        while rows := cur.fetchmany():
+            all_steps.extend(_step_row_to_dict(row) for row in rows)
+
+    root = _load_json_fields(
+        dict(agent_run_row),
+        ["input_messages", "output_messages", "tags", "langgraph_metadata", "runtime"],
+    )
+    root["id"] = root["run_id"]
+    root["run_type"] = "agent_run"
+    root["children"] = []
+
+    if not all_steps:
+        return root
 
-        return traces
+    all_steps.sort(key=lambda x: x["step_index"])
 
-    except Exception as e:
-        print(f"❌ Error retrieving trace list: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        if conn:
-            conn.close()
-    """
-    Retrieves a list of all agent runs (trace headers) for the sidebar.
-    """
-    conn = None
-    try:
-        conn = get_db_conn()
-        cur = conn.cursor()
+    # Single pass: each node adopts its (possibly not yet visited) children
+    # bucket by identity, so no second attach pass or node copies are needed.
+    # Iterating in step_index order keeps every children list sorted for free.
+    step_ids = {step["step_id"] for step in all_steps}
+    children_by_parent = defaultdict(list)
+    root_children = []
 
-        cur.execute(
-            "SELECT run_id, name, start_time, status, total_cost, total_tokens FROM agent_runs ORDER BY start_time DESC"
-        )
-        rows = cur.fetchall()
+    for step in all_steps:
+        step["id"] = step["step_id"]
+        step["children"] = children_by_parent[step["step_id"]]
+        parent_id = step.get("previous_step_id")
+        if parent_id and parent_id in step_ids:
+            children_by_parent[parent_id].append(step)
+        else:
+            root_children.append(step)
 
-        traces = []
-        for row in rows:
-            trace = dict(row)
-            if not trace.get("name"):
-                trace["name"] = trace["run_id"]
-            traces.append(trace)
+    root["children"] = root_children
+    return root
 
-        return traces
 
-    except Exception as e:
-        print(f"❌ Error retrieving trace list: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        if conn:
-            conn.close()
+@functools.lru_cache(maxsize=256)
+def _nested_trace_cached(trace_id: str, db_stamp: int) -> bytes:
+    """Build and encode the nested tree once per (trace, DB version).
+
+    Trace rows are immutable after a run finishes, so the encoded tree only
+    needs rebuilding when the database changes; the data_version stamp in
+    the cache key makes every ingestion commit invalidate stale entries.
+    """
+    root = _fetch_nested_trace_sync(trace_id)
+    return b"".join(_stream_nested_tree(root))
 
 
-# 4. Endpoint to retrieve a FULLY NESTED trace
 @app.get("/trace_nested/{trace_id}")
 async def get_nested_trace(trace_id: str):
     """
@@ -257,132 +599,88 @@ async def get_nested_trace(trace_id: str):
     then reconstructs them into a nested tree structure
     that the frontend (useFlowData, RunNode) expects.
     """
-    conn = None
     try:
-        conn = get_db_conn()
-        cur = conn.cursor()
+        db_stamp = _db_stamp()
 
-        cur.execute("SELECT * FROM agent_runs WHERE run_id = ?", (trace_id,))
-        agent_run_row = cur.fetchone()
-
-        if not agent_run_row:
-            raise HTTPException(
-                status_code=404, detail=f"Agent run with run_id '{trace_id}' not found."
-            )
-
-        root = _load_json_fields(
-            dict(agent_run_row),
-            ["input_messages", "output_messages", "tags", "langgraph_metadata", "runtime"],
-        )
-        root["id"] = root["run_id"]
-        root["run_type"] = "agent_run"
-        root["children"] = []
-
-        all_steps = []
-        cur.execute(
-            "SELECT * FROM call_model WHERE run_id = ? AND step_id != ?", (trace_id, trace_id)
-        )
-        for row in cur.fetchall():
-            step = _load_json_fields(dict(row), ["tool_call_requests"])
-            step["run_type"] = "llm"
-            step["name"] = step.get("model_name") or "llm_step"
-            all_steps.append(step)
-
-        cur.execute(
-            "SELECT * FROM call_tool WHERE run_id = ? AND step_id != ?", (trace_id, trace_id)
-        )
-        for row in cur.fetchall():
-            step = _load_json_fields(dict(row), ["tool_args"])
-            step["run_type"] = "tool"
-            step["name"] = step.get("tool_name") or "tool_step"
-            all_steps.append(step)
-
-        cur.execute(
-            "SELECT * FROM call_chain WHERE run_id = ? AND step_id != ?", (trace_id, trace_id)
-        )
-        for row in cur.fetchall():
-            step = _load_json_fields(dict(row), ["chain_input_messages", "chain_output_messages"])
-            step["run_type"] = "chain"
-            step["name"] = step.get("chain_name") or "chain_step"
-            all_steps.append(step)
-
-        if not all_steps:
-            return root
-
-        all_steps.sort(key=lambda x: x["step_index"])
-        node_map = {}
-
-        for step in all_steps:
-            node = dict(step)
-            node["id"] = node["step_id"]
-            node["children"] = []
-            node_map[node["id"]] = node
-
-        root_children = []
-        for node in node_map.values():
-            parent_id = node.get("previous_step_id")
-            if parent_id and parent_id in node_map:
-                parent = node_map[parent_id]
-                parent["children"].append(node)
-            else:
-                root_children.append(node)
-
-        root["children"] = sorted(root_children, key=lambda x: x["step_index"])
-        return root
+        # Run the synchronous sqlite3 work on a worker thread so the event
+        # loop keeps serving other requests (e.g. /query_agent) meanwhile.
+        body = await asyncio.to_thread(_nested_trace_cached, trace_id, db_stamp)
+        return Response(content=body, media_type="application/json")
 
     except HTTPException as http_exc:
         raise http_exc
     except Exception as e:
-        print(f"❌ Error retrieving nested trace: {e}")
+        logger.error("Error retrieving nested trace: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        if conn:
-            conn.close()
 
 
 # 5. Original /trace/{trace_id} endpoint
-@app.get("/trace/{trace_id}")
-async def get_trace(trace_id: str):
-    """
-    Retrieves a main agent run and all its child steps (flat list).
+def _fetch_trace_sync(trace_id: str, fields: Optional[str] = None) -> dict:
+    """Blocking DB work for /trace: fetch the run and its flat step list.
+
+    fields="header" skips the step query entirely (tooltip/header views);
+    fields="steps" returns the header with its JSON columns left as raw text.
     """
-    conn = None
-    try:
-        conn = get_db_conn()
+    with get_db_conn() as conn:
         cur = conn.cursor()
 
-        cur.execute("SELECT * FROM agent_runs WHERE run_id = ?", (trace_id,))
+        cur.execute(_SQL_AGENT_RUN, (trace_id,))
         agent_run_row = cur.fetchone()
         if not agent_run_row:
             raise HTTPException(status_code=404, detail="Agent run not found.")
 
+        all_steps = []
+        if fields != "header":
+            cur.arraysize = FETCH_BATCH_SIZE
+            cur.execute(_STEPS_UNION_SQL, (trace_id,) * 3)
+            while rows := cur.fetchmany():
+                all_steps.extend(_step_row_to_dict(row) for row in rows)
+
+    agent_run = dict(agent_run_row)
+    if fields != "steps":
         agent_run = _load_json_fields(
-            dict(agent_run_row),
+            agent_run,
             ["input_messages", "output_messages", "tags", "langgraph_metadata", "runtime"],
         )
-        all_steps = []
 
-        cur.execute("SELECT * FROM call_model WHERE run_id = ?", (trace_id,))
-        for row in cur.fetchall():
-            all_steps.append(_load_json_fields(dict(row), ["tool_call_requests"]))
-        cur.execute("SELECT * FROM call_tool WHERE run_id = ?", (trace_id,))
-        for row in cur.fetchall():
-            all_steps.append(_load_json_fields(dict(row), ["tool_args"]))
-        cur.execute("SELECT * FROM call_chain WHERE run_id = ?", (trace_id,))
-        for row in cur.fetchall():
-            all_steps.append(
-                _load_json_fields(dict(row), ["chain_input_messages", "chain_output_messages"])
-            )
+    if fields == "header":
+        return {"agent_run": agent_run}
+
+    all_steps.sort(key=lambda x: x["step_index"])
+    return {"agent_run": agent_run, "steps": all_steps}
 
-        all_steps.sort(key=lambda x: x["step_index"])
-        return {"agent_run": agent_run, "steps": all_steps}
 
+@app.get("/trace/{trace_id}")
+async def get_trace(trace_id: str, request: Request, fields: Optional[str] = None):
+    """
+    Retrieves a main agent run and all its child steps (flat list).
+
+    Pass ?fields=header to fetch just the agent_run row, or ?fields=steps to
+    skip JSON parsing of the header columns.
+    """
+    try:
+        db_stamp = _db_stamp()
+
+        # Traces are immutable once written, so (trace, DB version, projection)
+        # fully identifies the payload; a matching If-None-Match skips all
+        # work. The data_version stamp moves on every commit, including WAL
+        # commits the main file's mtime would miss.
+        etag = f'"{trace_id}-{db_stamp}-{fields or "full"}"'
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304)
+
+        result = await asyncio.to_thread(_fetch_trace_sync, trace_id, fields)
+        return Response(
+            content=orjson.dumps(result),
+            media_type="application/json",
+            headers={"ETag": etag},
+        )
+
+    except HTTPException as http_exc:
+        raise http_exc
     except Exception as e:
-        print(f"❌ Error retrieving trace: {e}")
+        logger.error("Error retrieving trace: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        if conn:
-            conn.close()
 
 
 # Optional: A simple root endpoint to check if the server is running
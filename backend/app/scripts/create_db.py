@@ -15,18 +15,15 @@ used for storing LangSmith trace data in a unified schema.
 # This will place the DB next to main.py
 DB_PATH = "/app/data/agent_debug_db.sqlite"
 
-# SQL DDL for the tables. We drop existing tables to ensure the schema
-# matches exactly.
-# SQL DDL for the tables. We drop existing tables to ensure the schema
-# matches exactly.
-SCHEMA_SQL = """
-DROP TABLE IF EXISTS agent_runs;
-DROP TABLE IF EXISTS steps;
-DROP TABLE IF EXISTS call_model;
-DROP TABLE IF EXISTS call_tool;
-DROP TABLE IF EXISTS call_chain;
+# Schema version recorded in PRAGMA user_version; bump it (and add a
+# migration below) whenever the DDL changes.
+SCHEMA_VERSION = 1
 
-CREATE TABLE agent_runs (
+# SQL DDL for the tables. Creation is non-destructive: IF NOT EXISTS keeps
+# re-runs from touching existing data, and real schema changes go through
+# the user_version gate in ensure_schema.
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS agent_runs (
     run_id TEXT PRIMARY KEY,
     name TEXT,
     start_time TEXT,
@@ -46,7 +43,7 @@ CREATE TABLE agent_runs (
     total_cost REAL
 );
 
-CREATE TABLE call_model (
+CREATE TABLE IF NOT EXISTS call_model (
     step_id TEXT PRIMARY KEY,
     run_id TEXT,
     step_index INTEGER,
@@ -71,7 +68,7 @@ CREATE TABLE call_model (
     FOREIGN KEY(run_id) REFERENCES agent_runs(run_id)
 );
 
-CREATE TABLE call_tool (
+CREATE TABLE IF NOT EXISTS call_tool (
     step_id TEXT PRIMARY KEY,
     run_id TEXT,
     step_index INTEGER,
@@ -91,7 +88,7 @@ CREATE TABLE call_tool (
     FOREIGN KEY(run_id) REFERENCES agent_runs(run_id)
 );
 
-CREATE TABLE call_chain (
+CREATE TABLE IF NOT EXISTS call_chain (
     step_id TEXT PRIMARY KEY,
     run_id TEXT,
     step_index INTEGER,
@@ -113,15 +110,33 @@ CREATE TABLE call_chain (
 
     FOREIGN KEY(run_id) REFERENCES agent_runs(run_id)
 );
+
+-- Trace fetches filter on run_id and sort by step_index; without these
+-- covering indexes SQLite scans the whole step table per request. The
+-- agent_runs index serves the ORDER BY start_time DESC listing directly.
+CREATE INDEX IF NOT EXISTS ix_call_model_run  ON call_model(run_id, step_index);
+CREATE INDEX IF NOT EXISTS ix_call_tool_run   ON call_tool(run_id, step_index);
+CREATE INDEX IF NOT EXISTS ix_call_chain_run  ON call_chain(run_id, step_index);
+CREATE INDEX IF NOT EXISTS ix_agent_runs_start ON agent_runs(start_time DESC);
+
+-- Step-chain traversal joins on previous_step_id; index it so walking a
+-- chain is a lookup per hop instead of a table scan per hop.
+CREATE INDEX IF NOT EXISTS ix_call_model_prev ON call_model(previous_step_id);
+CREATE INDEX IF NOT EXISTS ix_call_tool_prev  ON call_tool(previous_step_id);
+CREATE INDEX IF NOT EXISTS ix_call_chain_prev ON call_chain(previous_step_id);
+
+-- Populate sqlite_stat1 so the planner prefers the new indexes.
+ANALYZE;
 """
 
 
 def ensure_schema(db_path: str = DB_PATH) -> None:
     """Create the SQLite database and schema if it does not already exist.
 
-    This function is idempotent: existing tables will be replaced if the
-    schema differs, but existing data will be dropped. In a production system
-    you would instead apply migrations to avoid data loss.
+    This function is idempotent and non-destructive: existing tables and
+    data are left alone, and the DDL only runs when PRAGMA user_version is
+    behind SCHEMA_VERSION. Future schema changes should bump SCHEMA_VERSION
+    and migrate here rather than dropping tables.
     """
     # os.path.dirname("agent_debug_db.sqlite") is "" (empty string)
     # os.makedirs("", exist_ok=True) will do nothing, which is correct.
@@ -131,10 +146,22 @@ def ensure_schema(db_path: str = DB_PATH) -> None:
 
     conn = sqlite3.connect(db_path)
     cur = conn.cursor()
-    cur.executescript(SCHEMA_SQL)
+    if cur.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+        # 64 KiB pages keep the JSON blob columns (messages, metadata, tool
+        # calls) on their row's page instead of spilling into overflow-page
+        # chains. page_size only takes effect before the first page is
+        # written and cannot change under WAL, so it must precede the WAL
+        # switch; on an already-populated database the pragma is a no-op.
+        cur.execute("PRAGMA page_size=65536")
+        # WAL is a persistent database property: setting it once at creation
+        # means every later connection (ingestion writers, agent readers)
+        # opens in WAL without re-negotiating the journal mode.
+        cur.execute("PRAGMA journal_mode=WAL")
+        cur.executescript(SCHEMA_SQL)
+        cur.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+        print(f"Schema ensured at: {db_path}")
     conn.commit()
     conn.close()
-    print(f"Schema ensured at: {db_path}")
 
 
 if __name__ == "__main__":
@@ -1,9 +1,20 @@
+import ast
+import asyncio
+import calendar
 import json
 import os
 import sqlite3
+import threading
 import uuid
-from datetime import datetime
-from typing import Any, Dict, List
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+import orjson
+
+try:
+    import ijson
+except ImportError:  # pragma: no cover - streaming is optional
+    ijson = None
 
 # Make sure this import is correct based on your project structure
 # If main.py is in the root, and this is in /scripts, it should be:
@@ -11,107 +22,292 @@ from typing import Any, Dict, List
 from app.scripts.create_db import ensure_schema, DB_PATH
 
 
+# Hoisted path tuples for the hot accessors in the parse functions, so the
+# list literals are not rebuilt on every run.
+_GENERATION_PATH = ("outputs", "generations", 0, 0)
+_METADATA_PATH = ("extra", "metadata")
+_RUNTIME_PATH = ("extra", "runtime")
+_INPUTS_INPUT = ("inputs", "input")
+_INPUTS_MESSAGES = ("inputs", "messages")
+_OUTPUTS_OUTPUT = ("outputs", "output")
+_OUTPUTS_MESSAGES = ("outputs", "messages")
+
+
+# Column orders for the four target tables; the insert SQL is generated from
+# these once at import. Statements are upserts rather than INSERT OR REPLACE:
+# REPLACE is a DELETE plus INSERT, which churns pages and re-checks the
+# child-table foreign keys on every re-ingest, while ON CONFLICT DO UPDATE
+# rewrites the row in place.
+_AGENT_RUN_COLUMNS = (
+    "run_id", "name", "start_time", "end_time", "status", "error",
+    "user_id", "session_id", "thread_id", "input_messages", "output_messages",
+    "model_name", "tags", "langgraph_metadata", "runtime",
+    "total_tokens", "total_cost",
+)
+_CALL_MODEL_COLUMNS = (
+    "step_id", "run_id", "step_index", "previous_step_id",
+    "start_time", "end_time",
+    "prompt_text", "llm_output_text",
+    "llm_input_tokens", "llm_output_tokens", "llm_total_tokens",
+    "llm_prompt_cost", "llm_completion_cost", "llm_total_cost",
+    "finish_reason", "model_name", "model_provider",
+    "tool_call_requests",
+)
+_CALL_TOOL_COLUMNS = (
+    "step_id", "run_id", "step_index", "previous_step_id",
+    "start_time", "end_time",
+    "tool_name", "tool_args", "tool_status",
+    "tool_response", "tool_message_content",
+    "tool_cost", "tool_latency_ms",
+)
+_CALL_CHAIN_COLUMNS = (
+    "step_id", "run_id", "step_index", "previous_step_id",
+    "start_time", "end_time",
+    "chain_name", "chain_status", "chain_input_messages", "chain_output_messages",
+    "chain_prompt_tokens", "chain_completion_tokens", "chain_total_tokens",
+    "chain_prompt_cost", "chain_completion_cost", "chain_total_cost",
+)
+
+
+def _upsert_sql(table: str, columns: tuple, pk: str) -> str:
+    """Build an INSERT ... ON CONFLICT(pk) DO UPDATE statement."""
+    placeholders = ", ".join("?" for _ in columns)
+    updates = ", ".join(f"{c}=excluded.{c}" for c in columns if c != pk)
+    return (
+        f"INSERT INTO {table} ({', '.join(columns)}) "
+        f"VALUES ({placeholders}) "
+        f"ON CONFLICT({pk}) DO UPDATE SET {updates}"
+    )
+
+
+_INSERT_AGENT_RUN_SQL = _upsert_sql("agent_runs", _AGENT_RUN_COLUMNS, "run_id")
+_INSERT_CALL_MODEL_SQL = _upsert_sql("call_model", _CALL_MODEL_COLUMNS, "step_id")
+_INSERT_CALL_TOOL_SQL = _upsert_sql("call_tool", _CALL_TOOL_COLUMNS, "step_id")
+_INSERT_CALL_CHAIN_SQL = _upsert_sql("call_chain", _CALL_CHAIN_COLUMNS, "step_id")
+
+
+def _j(x: Any) -> Optional[str]:
+    """Serialize a value to a JSON string for storage, passing None through.
+
+    Strings (and bytes) are stored as-is: upstream LangSmith fields such as
+    input_messages often arrive already JSON-encoded, and re-dumping them
+    produced double-encoded payloads that bloated storage and forced a
+    double decode on read. Everything else goes through orjson, which is
+    markedly faster than the stdlib json for nested message structures.
+    The bytes are decoded before binding: bytes parameters land as BLOBs
+    regardless of column affinity, and the API layer expects text.
+    """
+    if x is None:
+        return None
+    if isinstance(x, str):
+        return x
+    if isinstance(x, bytes):
+        return x.decode()
+    return orjson.dumps(x, default=str).decode()
+
+
 def safe_get(d: Dict[str, Any], path: List[Any], default: Any = None) -> Any:
     """Safely traverse nested dictionaries and lists.
 
     Given a dictionary `d` and a sequence of keys/indexes `path`, attempt to
     navigate the nested structure and return the value found. If any part of
     the path does not exist, return `default` instead of raising an error.
+
+    Traversal is a bare subscript per hop — `__getitem__` handles dicts and
+    lists alike, and the except path only fires for malformed dumps, which
+    is far cheaper than isinstance dispatch on every hop of every run.
     """
     cur: Any = d
-    for p in path:
-        if isinstance(cur, dict):
-            cur = cur.get(p, default)
-        elif isinstance(cur, list) and isinstance(p, int) and 0 <= p < len(cur):
+    try:
+        for p in path:
             cur = cur[p]
-        else:
-            return default
-        if cur is None:
-            return default
+            if cur is None:
+                return default
+    except (KeyError, IndexError, TypeError):
+        return default
     return cur
 
 
+# One writer connection per process, mirroring the read-side connection in
+# observability_agent.tools.database: reopening per ingest paid connection
+# setup and a cold page cache every time. The RLock guards lazy init and
+# serializes whole write transactions across threads (get_conn may be called
+# while the transaction lock is already held, hence reentrant).
+_WRITE_CONN: Optional[sqlite3.Connection] = None
+_WRITE_LOCK = threading.RLock()
+
+
 def get_conn() -> sqlite3.Connection:
-    """Get a SQLite connection without resetting existing tables.
+    """Get the shared SQLite writer connection, creating it lazily.
 
-    If the database file does not yet exist, this will call
-    `ensure_schema()` once to create the tables. Unlike the previous
-    implementation, we do not call `ensure_schema()` on every connection
-    because that would drop and recreate the tables, losing data. Instead,
-    this lazily initialises the schema only if needed.
+    If the database file does not yet exist, `ensure_schema()` runs once to
+    create the tables. Callers must not close the returned connection and
+    should hold _WRITE_LOCK for the duration of a write transaction.
     """
-    # Only initialise schema if database file does not exist
-    if not os.path.exists(DB_PATH):
-        ensure_schema(DB_PATH)
-    conn = sqlite3.connect(DB_PATH)
+    global _WRITE_CONN
+    with _WRITE_LOCK:
+        if _WRITE_CONN is None:
+            if not os.path.exists(DB_PATH):
+                ensure_schema(DB_PATH)
+            _WRITE_CONN = _open_conn()
+        return _WRITE_CONN
+
+
+def _open_conn() -> sqlite3.Connection:
+    # isolation_level=None puts the connection in autocommit: transactions
+    # are opened only by our explicit BEGIN IMMEDIATE, giving the batched
+    # insert paths deterministic boundaries (the implicit-transaction mode
+    # silently commits around DDL and other statement classes).
+    # cached_statements is raised from the default 128 so the four upsert
+    # statements plus the agent's ad-hoc queries never evict each other from
+    # the connection's prepared-statement cache.
+    conn = sqlite3.connect(
+        DB_PATH,
+        isolation_level=None,
+        check_same_thread=False,
+        cached_statements=256,
+    )
     conn.execute("PRAGMA foreign_keys = ON;")
+    # WAL lets the agent's read-only queries proceed while ingestion writes,
+    # and synchronous=NORMAL drops the full fsync per commit (safe in WAL:
+    # a crash can lose the last commit but cannot corrupt the database).
+    conn.execute("PRAGMA journal_mode=WAL;")
+    conn.execute("PRAGMA synchronous=NORMAL;")
+    conn.execute("PRAGMA temp_store=MEMORY;")
+    conn.execute("PRAGMA cache_size=-65536;")
+    conn.execute("PRAGMA mmap_size=268435456;")
+    # ~8 MiB checkpoint target with the 64 KiB pages set at creation.
+    conn.execute("PRAGMA wal_autocheckpoint=128;")
+    conn.execute("PRAGMA busy_timeout=5000;")
     return conn
 
 
 def parse_llm_step(run: Dict[str, Any]) -> Dict[str, Any]:
     """Extract fields for an LLM step from a LangSmith run dict."""
-    usage = {
-        "input_tokens": run.get("prompt_tokens"),
-        "output_tokens": run.get("completion_tokens"),
-        "total_tokens": run.get("total_tokens"),
-    }
-    # Costs may be nested or separate. We attempt to pull from top level.
-    costs = {
-        "prompt_cost": run.get("prompt_cost"),
-        "completion_cost": run.get("completion_cost"),
-        "total_cost": run.get("total_cost"),
-    }
-    # Attempt to extract the first generation for finish reason and text.
-    finish_reason = safe_get(
-        run,
-        ["outputs", "generations", 0, 0, "message", "kwargs", "response_metadata", "finish_reason"],
-    )
-    llm_output_text = safe_get(run, ["outputs", "generations", 0, 0, "text"])
-    tool_call_requests = safe_get(
-        run, ["outputs", "generations", 0, 0, "message", "kwargs", "tool_calls"], []
-    )
+    # Bind the bound method once and walk the shared outputs/generations
+    # prefix a single time; the old code re-traversed it for finish reason,
+    # text, and tool calls separately, re-hashing the same keys per field.
+    rg = run.get
+    first_gen = safe_get(run, _GENERATION_PATH, {})
+    if not isinstance(first_gen, dict):
+        first_gen = {}
+    message_kwargs = safe_get(first_gen, ("message", "kwargs"), {})
+    if not isinstance(message_kwargs, dict):
+        message_kwargs = {}
+    finish_reason = safe_get(message_kwargs, ("response_metadata", "finish_reason"))
+    tool_call_requests = message_kwargs.get("tool_calls") or []
     # Model metadata
-    meta = safe_get(run, ["extra", "metadata"], {})
+    meta = safe_get(run, _METADATA_PATH, {})
     return {
         "prompt_text": None,
-        "llm_output_text": llm_output_text,
-        "llm_input_tokens": usage["input_tokens"],
-        "llm_output_tokens": usage["output_tokens"],
-        "llm_total_tokens": usage["total_tokens"],
-        "llm_prompt_cost": costs["prompt_cost"],
-        "llm_completion_cost": costs["completion_cost"],
-        "llm_total_cost": costs["total_cost"],
+        "llm_output_text": first_gen.get("text"),
+        "llm_input_tokens": rg("prompt_tokens"),
+        "llm_output_tokens": rg("completion_tokens"),
+        "llm_total_tokens": rg("total_tokens"),
+        "llm_prompt_cost": rg("prompt_cost"),
+        "llm_completion_cost": rg("completion_cost"),
+        "llm_total_cost": rg("total_cost"),
         "finish_reason": finish_reason,
-        "model_name": meta.get("ls_model_name") or run.get("name"),  # Fallback to run name
+        "model_name": meta.get("ls_model_name") or rg("name"),  # Fallback to run name
         "model_provider": meta.get("ls_provider"),
         "tool_call_requests": tool_call_requests,
     }
 
 
+def _ts_to_us(ts: str) -> int:
+    """Parse a 'YYYY-MM-DD HH:MM:SS[.ffffff][+TZ]' stamp to epoch microseconds.
+
+    datetime.strptime is an order of magnitude slower than fixed-offset
+    slicing for this known layout, and it runs twice per tool run. The
+    separator at position 10 (space or 'T') is never inspected. Raises on
+    malformed input; the caller treats that as an unknown latency.
+    """
+    s = ts.split("+")[0]
+    seconds = calendar.timegm((
+        int(s[0:4]), int(s[5:7]), int(s[8:10]),
+        int(s[11:13]), int(s[14:16]), int(s[17:19]),
+        0, 0, 0,
+    ))
+    micros = 0
+    if len(s) > 20 and s[19] == ".":
+        micros = int(s[20:26].ljust(6, "0"))
+    return seconds * 1_000_000 + micros
+
+
+def _parse_int(x: Any) -> int:
+    try:
+        return int(x)
+    except Exception:
+        return 0
+
+
+def _parse_cost(x: Any) -> float:
+    try:
+        return float(x)
+    except Exception:
+        return 0.0
+
+
+def _run_sort_key(run: Dict[str, Any]) -> int:
+    """Chronological sort key: start_time as epoch microseconds.
+
+    Integer comparisons are a single machine compare; sorting the ISO
+    strings directly cost O(len) per comparison across timsort's n log n
+    comparisons. Missing or malformed stamps sort first.
+    """
+    ts = run.get("start_time")
+    if not ts:
+        return 0
+    try:
+        return _ts_to_us(ts)
+    except Exception:
+        return 0
+
+
+def _parse_args_string(args_input: str) -> Any:
+    """Decode a stringified tool-args payload.
+
+    Strings opening with '{"' or '[\"' are almost always genuine JSON, so
+    try the C json parser first and only fall back to ast.literal_eval for
+    Python-repr dicts (single quotes). Anything unparseable is returned raw.
+    """
+    stripped = args_input.lstrip()
+    if stripped[:2] in ('{"', '["'):
+        try:
+            return json.loads(args_input)
+        except ValueError:
+            pass
+    try:
+        return ast.literal_eval(args_input)
+    except (ValueError, SyntaxError):
+        try:
+            return json.loads(args_input)
+        except Exception:
+            return args_input
+
+
 def parse_tool_step(run: Dict[str, Any]) -> Dict[str, Any]:
     """Extract fields for a tool call step from a LangSmith run dict."""
     result: Dict[str, Any] = {}
     result["tool_name"] = run.get("name")
-    # Parse tool arguments. They may be stored as a string representation of a dict.
-    args_input = safe_get(run, ["inputs", "input"])
+    # Parse tool arguments. They may be stored as a string representation of a
+    # dict (Python repr, not JSON). ast.literal_eval handles that natively in
+    # one pass — the old replace("'", '"') + json.loads round corrupted any
+    # apostrophe inside a string value. Falls back to the raw string.
+    args_input = safe_get(run, _INPUTS_INPUT)
     if isinstance(args_input, str):
-        # Attempt to normalise single quotes to double quotes for JSON parsing
-        try:
-            cleaned = args_input
-            # Replace single quotes with double quotes around keys and strings
-            # This is a best‑effort; if it fails we store the raw string
-            result["tool_args"] = json.loads(cleaned.replace("'", '"'))
-        except Exception:
-            result["tool_args"] = args_input
+        result["tool_args"] = _parse_args_string(args_input)
     else:
         result["tool_args"] = args_input
-    # Tool status and response content
-    status = safe_get(run, ["outputs", "output", "status"])
+    # Tool status and response content come from the same outputs.output
+    # object — fetch it once instead of traversing the prefix twice.
     # Output may be nested JSON or plain string. For tools we assume a dict with 'content' field or string.
-    output_obj = safe_get(run, ["outputs", "output"])
+    output_obj = safe_get(run, _OUTPUTS_OUTPUT)
     if isinstance(output_obj, dict):
+        status = output_obj.get("status")
         response = output_obj.get("content")
     else:
+        status = None
         response = output_obj
     result["tool_status"] = status
     result["tool_response"] = response
@@ -120,16 +316,9 @@ def parse_tool_step(run: Dict[str, Any]) -> Dict[str, Any]:
     result["tool_cost"] = run.get("total_cost")
     # Compute latency in milliseconds if timestamps parse
     try:
-        # Timestamps might not have fractional seconds
-        start_str = run["start_time"].split("+")[0]  # Remove timezone
-        end_str = run["end_time"].split("+")[0]  # Remove timezone
-        time_format = "%Y-%m-%d %H:%M:%S"
-        if "." in start_str:
-            time_format += ".%f"
-
-        start = datetime.strptime(start_str, time_format)
-        end = datetime.strptime(end_str, time_format)
-        result["tool_latency_ms"] = int((end - start).total_seconds() * 1000)
+        start_us = _ts_to_us(run["start_time"])
+        end_us = _ts_to_us(run["end_time"])
+        result["tool_latency_ms"] = (end_us - start_us) // 1000
     except Exception:
         result["tool_latency_ms"] = None
     return result
@@ -161,11 +350,11 @@ def parse_chain_step(run: Dict[str, Any]) -> Dict[str, Any]:
     # Chain‑specific fields
     result["chain_name"] = run.get("name")
     result["chain_status"] = run.get("status")
-    result["chain_input_messages"] = safe_get(run, ["inputs", "messages"]) or safe_get(
-        run, ["inputs", "input"]
+    result["chain_input_messages"] = safe_get(run, _INPUTS_MESSAGES) or safe_get(
+        run, _INPUTS_INPUT
     )
-    result["chain_output_messages"] = safe_get(run, ["outputs", "messages"]) or safe_get(
-        run, ["outputs", "output"]
+    result["chain_output_messages"] = safe_get(run, _OUTPUTS_MESSAGES) or safe_get(
+        run, _OUTPUTS_OUTPUT
     )
     result["chain_prompt_tokens"] = to_int(run.get("prompt_tokens"))
     result["chain_completion_tokens"] = to_int(run.get("completion_tokens"))
@@ -176,15 +365,20 @@ def parse_chain_step(run: Dict[str, Any]) -> Dict[str, Any]:
     return result
 
 
-def ingest_session(runs: List[Dict[str, Any]], trace_id: str) -> None:
-    """Ingest a list of LangSmith run dicts belonging to the same trace.
+def _build_session_rows(
+    runs: List[Dict[str, Any]],
+    trace_id: str,
+) -> Optional[tuple]:
+    """Parse one trace's runs into ready-to-bind row tuples.
 
-    This function aggregates the runs into a single agent_runs row identified
-    by `trace_id` and inserts one row per run into the corresponding
-    `call_model`, `call_tool`, or `call_chain` table.
+    Returns (agent_row, llm_rows, tool_rows, chain_rows), or None when
+    there is nothing to ingest. This is the CPU-bound half of ingestion —
+    timestamp parsing, aggregation, and JSON serialization — and it touches
+    no database state, so callers can run it before opening a transaction
+    and keep the write lock held only for the actual inserts.
     """
     if not runs:
-        return
+        return None
 
     # Find the root run (the one whose id matches the trace_id, or has no parent)
     root_run = next((r for r in runs if r.get("id") == trace_id), None)
@@ -199,88 +393,30 @@ def ingest_session(runs: List[Dict[str, Any]], trace_id: str) -> None:
             runs[0],  # As a last resort, just use the first run
         )
 
-    # Sort runs chronologically by start_time for ordering
-    # Add a fallback for runs that might be missing start_time
-    sorted_runs = sorted(runs, key=lambda r: r.get("start_time") or "1970-01-01T00:00:00")
+    # Sort runs chronologically by start_time for ordering; the key function
+    # runs once per run and missing start_times sort first.
+    sorted_runs = sorted(runs, key=_run_sort_key)
 
     start_time = root_run.get("start_time")
     end_time = root_run.get("end_time")
     session_id = root_run.get("session_id") or root_run.get("trace_id")
     name = root_run.get("name")
 
-    # Determine status and collect error messages across ALL runs
-    status = "success"
-    error_messages: List[str] = []
-    for run in sorted_runs:
-        if run.get("status") == "error" or run.get("error"):
-            status = "error"
-            if run.get("error"):
-                error_messages.append(str(run["error"]))
-    error = "\n".join(error_messages) if error_messages else None
-
     # Get input from root and output from last run
-    input_messages = safe_get(root_run, ["inputs", "input"]) or safe_get(
-        root_run, ["inputs", "messages"]
+    input_messages = safe_get(root_run, _INPUTS_INPUT) or safe_get(
+        root_run, _INPUTS_MESSAGES
     )
-    output_messages = safe_get(root_run, ["outputs", "output"]) or safe_get(
-        root_run, ["outputs", "messages"]
+    output_messages = safe_get(root_run, _OUTPUTS_OUTPUT) or safe_get(
+        root_run, _OUTPUTS_MESSAGES
     )
 
     # Metadata and runtime from the root run
-    meta = safe_get(root_run, ["extra", "metadata"], {})
-    runtime_info = safe_get(root_run, ["extra", "runtime"], {})
+    meta = safe_get(root_run, _METADATA_PATH, {})
+    runtime_info = safe_get(root_run, _RUNTIME_PATH, {})
     model_name = meta.get("ls_model_name")
     tags = root_run.get("tags")
     langgraph_metadata = meta
 
-    # Aggregate total tokens and cost across ALL runs
-    def parse_int(x: Any) -> int:
-        try:
-            return int(x)
-        except Exception:
-            return 0
-
-    total_tokens = sum(parse_int(run.get("total_tokens")) for run in sorted_runs)
-
-    def parse_cost(x: Any) -> float:
-        try:
-            return float(x)
-        except Exception:
-            return 0.0
-
-    total_cost = sum(parse_cost(run.get("total_cost")) for run in sorted_runs)
-
-    # Insert or replace the agent run row with run_id = trace_id
-    conn = get_conn()
-    cur = conn.cursor()
-    cur.execute(
-        """INSERT OR REPLACE INTO agent_runs (
-            run_id, name, start_time, end_time, status, error,
-            user_id, session_id, thread_id, input_messages, output_messages,
-            model_name, tags, langgraph_metadata, runtime,
-            total_tokens, total_cost
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-        (
-            trace_id,  # Use the common trace_id as the primary run_id
-            name,
-            start_time,
-            end_time,
-            status,
-            error,
-            None,
-            session_id,
-            None,
-            json.dumps(input_messages) if input_messages is not None else None,
-            json.dumps(output_messages) if output_messages is not None else None,
-            model_name,
-            json.dumps(tags) if tags is not None else None,
-            json.dumps(langgraph_metadata) if langgraph_metadata is not None else None,
-            json.dumps(runtime_info) if runtime_info is not None else None,
-            total_tokens,
-            total_cost,
-        ),
-    )
-
     # Build and insert step rows into their respective tables
     previous_step_id: str = None
     step_id_map = {r.get("id"): r for r in sorted_runs}
@@ -296,7 +432,27 @@ def ingest_session(runs: List[Dict[str, Any]], trace_id: str) -> None:
                 return parent_id
         return None
 
+    # Bucket step rows by target table so each table gets one executemany
+    # call: SQLite compiles each INSERT statement once and the per-row Python
+    # round-trip disappears. Everything still commits in one transaction.
+    # Status, error, and token/cost totals accumulate in the same pass, so
+    # each run dict is traversed once instead of once per aggregate.
+    llm_rows: List[tuple] = []
+    tool_rows: List[tuple] = []
+    chain_rows: List[tuple] = []
+    status = "success"
+    error_messages: List[str] = []
+    total_tokens = 0
+    total_cost = 0.0
+
     for idx, run in enumerate(sorted_runs):
+        if run.get("status") == "error" or run.get("error"):
+            status = "error"
+            if run.get("error"):
+                error_messages.append(str(run["error"]))
+        total_tokens += _parse_int(run.get("total_tokens"))
+        total_cost += _parse_cost(run.get("total_cost"))
+
         step_id = run.get("id") or str(uuid.uuid4())
         run_type = run.get("run_type")
 
@@ -315,16 +471,7 @@ def ingest_session(runs: List[Dict[str, Any]], trace_id: str) -> None:
 
         if run_type == "llm":
             llm_fields = parse_llm_step(run)
-            cur.execute(
-                """INSERT OR REPLACE INTO call_model (
-                    step_id, run_id, step_index, previous_step_id,
-                    start_time, end_time,
-                    prompt_text, llm_output_text,
-                    llm_input_tokens, llm_output_tokens, llm_total_tokens,
-                    llm_prompt_cost, llm_completion_cost, llm_total_cost,
-                    finish_reason, model_name, model_provider,
-                    tool_call_requests
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+            llm_rows.append(
                 common_values
                 + (
                     llm_fields["prompt_text"],
@@ -338,76 +485,126 @@ def ingest_session(runs: List[Dict[str, Any]], trace_id: str) -> None:
                     llm_fields["finish_reason"],
                     llm_fields["model_name"],
                     llm_fields["model_provider"],
-                    (
-                        json.dumps(llm_fields["tool_call_requests"])
-                        if llm_fields["tool_call_requests"] is not None
-                        else None
-                    ),
-                ),
+                    _j(llm_fields["tool_call_requests"]),
+                )
             )
         elif run_type == "tool":
             tool_fields = parse_tool_step(run)
-            cur.execute(
-                """INSERT OR REPLACE INTO call_tool (
-                    step_id, run_id, step_index, previous_step_id,
-                    start_time, end_time,
-                    tool_name, tool_args, tool_status,
-                    tool_response, tool_message_content,
-                    tool_cost, tool_latency_ms
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+            tool_rows.append(
                 common_values
                 + (
                     tool_fields["tool_name"],
-                    (
-                        json.dumps(tool_fields["tool_args"])
-                        if tool_fields["tool_args"] is not None
-                        else None
-                    ),
+                    _j(tool_fields["tool_args"]),
                     tool_fields["tool_status"],
                     tool_fields["tool_response"],
                     tool_fields["tool_message_content"],
                     tool_fields["tool_cost"],
                     tool_fields["tool_latency_ms"],
-                ),
+                )
             )
         elif run_type == "chain":
             chain_fields = parse_chain_step(run)
-            cur.execute(
-                """INSERT OR REPLACE INTO call_chain (
-                    step_id, run_id, step_index, previous_step_id,
-                    start_time, end_time,
-                    chain_name, chain_status, chain_input_messages, chain_output_messages,
-                    chain_prompt_tokens, chain_completion_tokens, chain_total_tokens,
-                    chain_prompt_cost, chain_completion_cost, chain_total_cost
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+            chain_rows.append(
                 common_values
                 + (
                     chain_fields["chain_name"],
                     chain_fields["chain_status"],
-                    (
-                        json.dumps(chain_fields["chain_input_messages"])
-                        if chain_fields["chain_input_messages"] is not None
-                        else None
-                    ),
-                    (
-                        json.dumps(chain_fields["chain_output_messages"])
-                        if chain_fields["chain_output_messages"] is not None
-                        else None
-                    ),
+                    _j(chain_fields["chain_input_messages"]),
+                    _j(chain_fields["chain_output_messages"]),
                     chain_fields["chain_prompt_tokens"],
                     chain_fields["chain_completion_tokens"],
                     chain_fields["chain_total_tokens"],
                     chain_fields["chain_prompt_cost"],
                     chain_fields["chain_completion_cost"],
                     chain_fields["chain_total_cost"],
-                ),
+                )
             )
 
         # This is for the *chronological* previous step, as a fallback
         previous_step_id = step_id
 
-    conn.commit()
-    conn.close()
+    error = "\n".join(error_messages) if error_messages else None
+
+    agent_row = (
+        trace_id,  # Use the common trace_id as the primary run_id
+        name,
+        start_time,
+        end_time,
+        status,
+        error,
+        None,
+        session_id,
+        None,
+        _j(input_messages),
+        _j(output_messages),
+        model_name,
+        _j(tags),
+        _j(langgraph_metadata),
+        _j(runtime_info),
+        total_tokens,
+        total_cost,
+    )
+    return (agent_row, llm_rows, tool_rows, chain_rows)
+
+
+def _write_session_rows(conn: sqlite3.Connection, session_rows: tuple) -> None:
+    """Insert one trace's prebuilt rows; the caller owns the transaction."""
+    agent_row, llm_rows, tool_rows, chain_rows = session_rows
+
+    cur = conn.cursor()
+    cur.execute(_INSERT_AGENT_RUN_SQL, agent_row)
+
+    if llm_rows:
+        cur.executemany(
+            _INSERT_CALL_MODEL_SQL,
+            llm_rows,
+        )
+    if tool_rows:
+        cur.executemany(
+            _INSERT_CALL_TOOL_SQL,
+            tool_rows,
+        )
+    if chain_rows:
+        cur.executemany(
+            _INSERT_CALL_CHAIN_SQL,
+            chain_rows,
+        )
+
+
+def ingest_session(
+    runs: List[Dict[str, Any]],
+    trace_id: str,
+    conn: Optional[sqlite3.Connection] = None,
+) -> None:
+    """Ingest a list of LangSmith run dicts belonging to the same trace.
+
+    This function aggregates the runs into a single agent_runs row identified
+    by `trace_id` and inserts one row per run into the corresponding
+    `call_model`, `call_tool`, or `call_chain` table.
+
+    Row tuples are built (including all JSON serialization) before any
+    transaction opens, so the write lock and the database are held only for
+    the inserts themselves. When `conn` is provided the caller owns the
+    connection and transaction; otherwise this call runs as its own
+    transaction on the shared writer connection.
+    """
+    session_rows = _build_session_rows(runs, trace_id)
+    if session_rows is None:
+        return
+
+    if conn is not None:
+        _write_session_rows(conn, session_rows)
+        return
+
+    with _WRITE_LOCK:
+        shared = get_conn()
+        shared.execute("BEGIN IMMEDIATE")
+        try:
+            _write_session_rows(shared, session_rows)
+            shared.commit()
+        except Exception:
+            shared.rollback()
+            raise
 
 
 def ingest_dict(data: dict) -> None:
@@ -435,27 +632,102 @@ def ingest_dict(data: dict) -> None:
         print("No runs found to ingest.")
         return
 
-    # *** MODIFIED SECTION ***
-    # Group all runs by their 'trace_id'
-    groups: Dict[str, List[Dict[str, Any]]] = {}
-    for run in runs_list:
-        trace_id = run.get("trace_id")
-        if not trace_id:
-            # Fallback for runs that might be missing a trace_id
-            trace_id = run.get("id") or str(uuid.uuid4())
-        groups.setdefault(trace_id, []).append(run)
-
-    # Ingest each group using its trace_id
+    _ingest_runs(runs_list)
+
+
+async def ingest_dict_async(data: dict) -> None:
+    """Async wrapper around ingest_dict for event-loop callers.
+
+    Ingestion is blocking work (parsing plus a SQLite write transaction), so
+    async endpoints dispatch it to a worker thread instead of stalling the
+    event loop. The write lock inside ingest_dict still serialises writers,
+    matching the run_sql_async pattern in the agent's database tool.
+    """
+    await asyncio.to_thread(ingest_dict, data)
+
+
+def _ingest_runs(runs_iter) -> None:
+    """Group an iterable of run dicts by trace_id and ingest them.
+
+    Accepts any iterable (a list or a lazy ijson stream). All groups are
+    written over one connection and one transaction: per-session connections
+    paid connect + pragma setup N times, and per-session commits made each
+    trace its own fsync.
+    """
+    # defaultdict hashes the key once per run; setdefault paid a second
+    # lookup (and built a throwaway list) on every miss. uuid4 only runs in
+    # the rare case a run lacks both trace_id and id.
+    groups: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    for run in runs_iter:
+        groups[run.get("trace_id") or run.get("id") or str(uuid.uuid4())].append(run)
+
+    if not groups:
+        print("No runs found to ingest.")
+        return
+
+    # All parsing and JSON serialization happens up front, outside the lock
+    # and the transaction: BEGIN IMMEDIATE blocks every other writer, so the
+    # transaction should cover only the inserts, not the CPU-bound row
+    # construction.
+    sessions = []
     for trace_id, group_runs in groups.items():
-        ingest_session(group_runs, trace_id)
+        session_rows = _build_session_rows(group_runs, trace_id)
+        if session_rows is not None:
+            sessions.append(session_rows)
+
+    if not sessions:
+        print("No runs found to ingest.")
+        return
+
+    with _WRITE_LOCK:
+        conn = get_conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for session_rows in sessions:
+                _write_session_rows(conn, session_rows)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        # Refresh planner statistics after a bulk write so read queries keep
+        # choosing the run_id/step indexes as the tables grow; with recent
+        # stats this is a cheap no-op.
+        conn.execute("PRAGMA optimize")
 
 
 def ingest_file(json_path: str) -> None:
     """High-level helper to ingest a JSON file containing LangSmith runs.
 
     The file may contain a list of run objects, a single run object,
-    or a dictionary containing a 'runs' key.
+    or a dictionary containing a 'runs' key. When ijson is available the
+    runs are streamed off disk one at a time instead of materializing the
+    whole parsed dump up front, which bounds peak memory for large traces.
     """
+    if ijson is not None:
+        with open(json_path, "rb") as f:
+            # Peek the first non-whitespace byte to pick the stream prefix.
+            first = f.read(1)
+            while first.isspace():
+                first = f.read(1)
+            f.seek(0)
+            if first == b"[":
+                _ingest_runs(ijson.items(f, "item"))
+                return
+            if first == b"{":
+                ingested = False
+
+                def _tracked(stream):
+                    nonlocal ingested
+                    for run in stream:
+                        ingested = True
+                        yield run
+
+                _ingest_runs(_tracked(ijson.items(f, "runs.item")))
+                if ingested:
+                    return
+                # No "runs" key: treat the document as a single run object.
+                f.seek(0)
+
     with open(json_path, "r") as f:
         data = json.load(f)
     ingest_dict(data)
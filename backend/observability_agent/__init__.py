@@ -9,13 +9,14 @@ This package provides a modular multi-agent system for:
 
 from .core.graph import build_graph
 from .core.state import ObsState, AgentName
-from .utils.runner import run_obs_agent
+from .utils.runner import run_obs_agent, arun_obs_agent
 
 __all__ = [
     "build_graph",
     "ObsState",
     "AgentName",
     "run_obs_agent",
+    "arun_obs_agent",
 ]
 
 __version__ = "0.1.0"
@@ -1,6 +1,9 @@
 """Chart/visualization agent for creating data visualizations."""
 
 import json
+import re
+
+import orjson
 from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
 
 from ..core.state import ObsState
@@ -9,9 +12,37 @@ from ..tools import prepare_chart_data_tool
 from .schemas import ChartSpecResponse
 
 MAX_METADATA_ROWS = 20
+MAX_PROMPT_ROWS = 50
+
+# Words suggesting the user wants the model's judgement on chart choice;
+# their presence disables the deterministic fast path below.
+_AMBIGUITY_WORDS = ("why", "which", "explain", "choose")
+
+# Chart types a user can name explicitly ("pie chart of latency"); when one
+# appears the request goes to the LLM rather than the metadata suggestion.
+_CHART_TYPE_WORDS = frozenset(
+    {"bar", "line", "pie", "scatter", "area", "histogram", "table"}
+)
+
+_WORD_RE = re.compile(r"\w+")
+
+_CHART_SYSTEM = SystemMessage(
+    content=(
+        "You are a visualization agent.\n"
+        "You will receive:\n"
+        "1) The user's request for a chart.\n"
+        "2) A list of data rows (JSON-like dicts).\n\n"
+        "Return a structured response with:\n"
+        "- chart_type: The type of chart (bar, line, scatter, pie, etc.)\n"
+        "- x_field: The field name to use for x-axis\n"
+        "- y_field: The field name to use for y-axis\n"
+        "- data: The data rows to visualize (same as input)\n"
+        "- reasoning: Brief explanation of why this chart type and fields were chosen"
+    )
+)
 
 
-def chart_agent_node(state: ObsState, llm) -> ObsState:
+async def chart_agent_node(state: ObsState, llm, llm_with_structure=None) -> ObsState:
     """
     Generate chart specification (JSON) based on recent SQL results (last_rows).
 
@@ -26,6 +57,8 @@ def chart_agent_node(state: ObsState, llm) -> ObsState:
     Args:
         state: Current observability state with last_rows
         llm: Language model instance
+        llm_with_structure: Prebuilt ChartSpecResponse chain (built lazily
+            from llm when not supplied)
 
     Returns:
         Updated state with chart specification
@@ -62,40 +95,68 @@ def chart_agent_node(state: ObsState, llm) -> ObsState:
     # Prepare chart data and metadata
     chart_meta = {}
     try:
-        chart_ready = prepare_chart_data_tool.invoke({"rows": last_rows})
+        chart_ready = prepare_chart_data_tool().invoke({"rows": last_rows})
         prepared_rows = chart_ready["rows"]
         chart_meta = chart_ready.get("metadata", {})
     except Exception:
         prepared_rows = last_rows
         chart_meta = {}
 
-    system = SystemMessage(
-        content=(
-            "You are a visualization agent.\n"
-            "You will receive:\n"
-            "1) The user's request for a chart.\n"
-            "2) A list of data rows (JSON-like dicts).\n\n"
-            "Return a structured response with:\n"
-            "- chart_type: The type of chart (bar, line, scatter, pie, etc.)\n"
-            "- x_field: The field name to use for x-axis\n"
-            "- y_field: The field name to use for y-axis\n"
-            "- data: The data rows to visualize (same as input)\n"
-            "- reasoning: Brief explanation of why this chart type and fields were chosen"
-        )
+    # Fast path: when prepare_chart_data_tool derived the chart type from the
+    # data and both axes are known, and the user neither named a chart type
+    # nor asked for judgement about the choice, the LLM call adds latency
+    # without changing the answer.
+    user_text = user_message.content if isinstance(user_message.content, str) else ""
+    user_lower = user_text.lower()
+    user_tokens = frozenset(_WORD_RE.findall(user_lower))
+    deterministic = chart_meta.get("suggestion_derived", False) and all(
+        key in chart_meta for key in ("suggested_chart", "label_field", "value_field")
     )
-
-    helper_content = (
-        f"User request: {user_message.content}\n\n"
-        f"Prepared data rows: {prepared_rows}\n\n"
-        f"Chart metadata: {chart_meta}"
+    needs_llm = (
+        not deterministic
+        or not _CHART_TYPE_WORDS.isdisjoint(user_tokens)
+        or any(word in user_lower for word in _AMBIGUITY_WORDS)
     )
-    if planner_instruction:
-        helper_content += f"\n\nPlanner guidance:\n{planner_instruction}"
 
-    helper_user = HumanMessage(content=helper_content)
+    planner_hints = (planner_step or {}).get("chart_hints") or {}
+    if all(planner_hints.get(key) for key in ("chart_type", "x_field", "y_field")):
+        # The planner already decided the visualization; no model call needed.
+        chart_response = ChartSpecResponse(
+            chart_type=planner_hints["chart_type"],
+            x_field=planner_hints["x_field"],
+            y_field=planner_hints["y_field"],
+            data=prepared_rows,
+            reasoning=planner_hints.get("reasoning") or "From planner chart hints.",
+        )
+    elif needs_llm:
+        system = _CHART_SYSTEM
 
-    llm_with_structure = llm.with_structured_output(ChartSpecResponse)
-    chart_response = llm_with_structure.invoke([system, helper_user])
+        # Compact JSON keeps the prompt small (and json.dumps is far cheaper than
+        # list repr); the full row set still reaches the frontend via chart_data.
+        prompt_rows = json.dumps(
+            prepared_rows[:MAX_PROMPT_ROWS], separators=(",", ":"), default=str
+        )
+        helper_content = (
+            f"User request: {user_message.content}\n\n"
+            f"Prepared data rows (first {MAX_PROMPT_ROWS}): {prompt_rows}\n\n"
+            f"Chart metadata: {chart_meta}"
+        )
+        if planner_instruction:
+            helper_content += f"\n\nPlanner guidance:\n{planner_instruction}"
+
+        helper_user = HumanMessage(content=helper_content)
+
+        if llm_with_structure is None:
+            llm_with_structure = llm.with_structured_output(ChartSpecResponse)
+        chart_response = await llm_with_structure.ainvoke([system, helper_user])
+    else:
+        chart_response = ChartSpecResponse(
+            chart_type=chart_meta["suggested_chart"],
+            x_field=chart_meta["label_field"],
+            y_field=chart_meta["value_field"],
+            data=prepared_rows,
+            reasoning="Deterministic from prepare_chart_data_tool metadata.",
+        )
 
     # Create JSON spec for frontend
     chart_data = chart_response.data or prepared_rows
@@ -110,17 +171,24 @@ def chart_agent_node(state: ObsState, llm) -> ObsState:
         "data": chart_data
     }
 
+    # chart_spec itself already travels on the message as
+    # additional_kwargs["chart_spec"], so it is not duplicated here, and the
+    # preview is a tuple slice rather than a second full-list copy.
     chart_metadata = {
         "agent": "chart_agent",
-        "chart_spec": chart_spec,
-        "rows_preview": chart_data[:MAX_METADATA_ROWS],
+        "rows_preview": tuple(chart_data[:MAX_METADATA_ROWS]),
         "row_count": len(chart_data),
         "user_request": user_message.content,
         "source_metadata": chart_meta,
     }
 
+    # orjson indents in C; stdlib json.dumps(indent=2) is its slowest mode and
+    # dominates this node's CPU time for large datasets.
+    spec_body = orjson.dumps(
+        chart_spec, option=orjson.OPT_INDENT_2, default=str
+    ).decode()
     spec_msg = AIMessage(
-        content=f"**Reasoning:** {reasoning_text}\n\n```json\n{json.dumps(chart_spec, indent=2)}\n```",
+        content=f"**Reasoning:** {reasoning_text}\n\n```json\n{spec_body}\n```",
         additional_kwargs={
             "reasoning": reasoning_text,
             "chart_spec": chart_spec,
@@ -1,47 +1,83 @@
 """Diagnostics summary agent that explains root causes."""
 
+import io
 import json
+import re
 from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
 
 from ..core.state import ObsState
 from ..core.state_utils import agent_state_update
 
 
-def _format_row(row: dict) -> str:
-    parts = [f"{key}={value}" for key, value in row.items()]
-    return ", ".join(parts)
+_DIAG_SYSTEM_TEMPLATE = (
+    "You are a performance diagnostics assistant for an LLM agent platform.\n"
+    "The user reported that their {target_metric} changed unexpectedly.\n\n"
+    "You will be given analysis tables for overall change, by tool, and by agent.\n"
+    "Your job:\n"
+    "1) Decide whether there was a real change between the two windows "
+    "(recent={recent_hours}h vs baseline={baseline_hours}h)\n"
+    "2) Identify the top 1-3 likely causes with numeric evidence\n"
+    "3) Explain them in simple language\n"
+    "4) Recommend concrete next steps (limit retries, optimize prompts, etc.)\n"
+    "Always cite the key numbers you rely on. "
+    "{language_instruction}"
+)
+
+_HANGUL_RE = re.compile(r"[가-힣]")
+
+
+# Upper bounds for the summary prompt: LLM latency scales with input tokens,
+# so a runaway diagnostics run must not produce an unbounded prompt.
+MAX_PROMPT_CHARS = 16384
+_MAX_CELL_CHARS = 128
+
+
+def _clip_cell(value):
+    if isinstance(value, str) and len(value) > _MAX_CELL_CHARS:
+        return value[:_MAX_CELL_CHARS] + "…"
+    return value
+
+
+def _format_row(row) -> str:
+    # json.dumps formats the row in C; the output is prompt text only, so the
+    # compact JSON shape is as readable to the model as key=value pairs.
+    if isinstance(row, dict):
+        row = {key: _clip_cell(value) for key, value in row.items()}
+    return json.dumps(row, separators=(",", ":"), ensure_ascii=False, default=str)
 
 
 def format_diagnostics_results_for_prompt(results) -> str:
     if not results:
         return "No diagnostics result rows were produced."
 
-    lines = []
-    for result in results:
+    buf = io.StringIO()
+    for block_index, result in enumerate(results):
+        if buf.tell() > MAX_PROMPT_CHARS:
+            remaining = len(results) - block_index
+            buf.write(f"… (truncated, {remaining} more result blocks)\n")
+            break
         name = result.get("name", "step")
         desc = result.get("description", "")
         rows = result.get("rows") or []
-        lines.append(f"[{name}] {desc}")
+        buf.write(f"[{name}] {desc}\n")
 
         if not rows:
-            lines.append("  - (no rows)")
+            buf.write("  - (no rows)\n")
             continue
 
         preview = rows[:10]
         for idx, row in enumerate(preview, start=1):
-            if isinstance(row, dict):
-                row_text = _format_row(row)
-            else:
-                row_text = json.dumps(row, ensure_ascii=False)
-            lines.append(f"  {idx}. {row_text}")
+            buf.write(f"  {idx}. {_format_row(row)}\n")
 
         if len(rows) > len(preview):
-            lines.append(f"  ... (+{len(rows) - len(preview)} more rows)")
+            buf.write(f"  ... (+{len(rows) - len(preview)} more rows)\n")
 
-    return "\n".join(lines)
+    return buf.getvalue().rstrip("\n")
 
 
 def _last_user_message_text(state: ObsState) -> str:
+    # reversed() iterates lazily from the tail and exits at the first human
+    # message, so no window bound (or list copy) is needed.
     for message in reversed(state.get("messages", [])):
         if getattr(message, "type", "") == "human" and isinstance(message.content, str):
             return message.content
@@ -49,10 +85,10 @@ def _last_user_message_text(state: ObsState) -> str:
 
 
 def _should_use_korean(text: str) -> bool:
-    return any("\uac00" <= ch <= "\ud7a3" for ch in text)
+    return _HANGUL_RE.search(text) is not None
 
 
-def diagnostics_summary_agent_node(state: ObsState, llm) -> ObsState:
+async def diagnostics_summary_agent_node(state: ObsState, llm) -> ObsState:
     ctx = state.get("diagnostics_context", {})
     results = ctx.get("results", [])
     target_metric = ctx.get("target_metric", "latency")
@@ -70,30 +106,29 @@ def diagnostics_summary_agent_node(state: ObsState, llm) -> ObsState:
         )
         summary_msg = AIMessage(content=content)
         plan_index = state.get("plan_step_index", 0)
-        new_ctx = ctx.copy()
-        new_ctx["results"] = results
         return agent_state_update(
             state,
             messages=[summary_msg],
             active_agent="diagnostics_summary_agent",
             plan_step_index=plan_index + 1,
-            diagnostics_context=new_ctx,
+            diagnostics_context=ctx,
         )
 
-    system_prompt = (
-        "You are a performance diagnostics assistant for an LLM agent platform.\n"
-        f"The user reported that their {target_metric} changed unexpectedly.\n\n"
-        "You will be given analysis tables for overall change, by tool, and by agent.\n"
-        "Your job:\n"
-        "1) Decide whether there was a real change between the two windows "
-        f"(recent={recent_hours}h vs baseline={baseline_hours}h)\n"
-        "2) Identify the top 1-3 likely causes with numeric evidence\n"
-        "3) Explain them in simple language\n"
-        "4) Recommend concrete next steps (limit retries, optimize prompts, etc.)\n"
-        "Always cite the key numbers you rely on. "
-        "Respond in English."
+    system_prompt = _DIAG_SYSTEM_TEMPLATE.format(
+        target_metric=target_metric,
+        recent_hours=recent_hours,
+        baseline_hours=baseline_hours,
+        language_instruction=(
+            "Respond in Korean." if use_korean else "Respond in English."
+        ),
     )
 
+    plan_steps = state.get("plan", []) or []
+    plan_index = state.get("plan_step_index", 0)
+    outline = None
+    if plan_steps and plan_index < len(plan_steps):
+        outline = plan_steps[plan_index].get("summary_outline")
+
     context_text = format_diagnostics_results_for_prompt(results)
     user_prompt = (
         "Here are the diagnostics results:\n\n"
@@ -101,8 +136,12 @@ def diagnostics_summary_agent_node(state: ObsState, llm) -> ObsState:
         f"Explain why {target_metric} likely changed.\n"
         "If the data shows no significant change, say so and suggest monitoring steps."
     )
+    if outline:
+        # Planner already sketched the summary; following it keeps the
+        # response short and the output-token cost down.
+        user_prompt += f"\n\nFollow this outline and keep the summary brief:\n{outline}"
 
-    resp = llm.invoke(
+    resp = await llm.ainvoke(
         [
             SystemMessage(content=system_prompt),
             HumanMessage(content=user_prompt),
@@ -110,17 +149,13 @@ def diagnostics_summary_agent_node(state: ObsState, llm) -> ObsState:
     )
 
     summary_msg = AIMessage(content=resp.content)
-    plan_steps = state.get("plan", []) or []
-    plan_index = state.get("plan_step_index", 0)
-
-    # Reset diagnostics context so future runs start clean
-    new_ctx = ctx.copy()
-    new_ctx["results"] = results
 
+    # ctx is passed through unchanged: the only key ever written here was
+    # "results", with the exact value read from ctx, so copying was pure waste.
     return agent_state_update(
         state,
         messages=[summary_msg],
         active_agent="diagnostics_summary_agent",
         plan_step_index=plan_index + 1,
-        diagnostics_context=new_ctx,
+        diagnostics_context=ctx,
     )
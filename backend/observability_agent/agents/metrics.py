@@ -21,6 +21,21 @@ FORBIDDEN_DML = re.compile(r"\b(insert|update|delete|drop|create|replace)\b", re
 ALLOWED_TABLES = ("agent_runs", "call_model", "call_tool", "call_chain")
 
 
+# with_structured_output rebuilds schema metadata per call; bind once per
+# (model, schema) pair. Chat models are not hashable, so the cache keys on
+# id(llm) and keeps a reference to the model so its id cannot be recycled.
+_STRUCTURED_CHAINS: Dict[Tuple[int, type], Tuple[Any, Any]] = {}
+
+
+def _structured(llm, schema):
+    key = (id(llm), schema)
+    entry = _STRUCTURED_CHAINS.get(key)
+    if entry is None:
+        entry = (llm, llm.with_structured_output(schema))
+        _STRUCTURED_CHAINS[key] = entry
+    return entry[1]
+
+
 def _normalize_sql(sql: str) -> str:
     """Auto-fix common incompatibilities."""
     normalized = re.sub(r"(?i)string_agg", "GROUP_CONCAT", sql)
@@ -139,7 +154,7 @@ def metrics_agent_node(state: ObsState, llm, config: Optional[RunnableConfig] =
     Returns:
         Updated state with agent responses and data
     """
-    schema = get_observability_schema_tool.invoke({}, config=config)
+    schema = get_observability_schema_tool().invoke({}, config=config)
     user_message = state["messages"][-1]
     plan_steps = state.get("plan", []) or []
     plan_index = state.get("plan_step_index", 0)
@@ -204,7 +219,7 @@ def metrics_agent_node(state: ObsState, llm, config: Optional[RunnableConfig] =
         planner_messages.append(diagnostics_instruction)
     messages = [system] + planner_messages + state["messages"]
     request_text = diagnostics_goal or user_message.content
-    llm_with_structure = llm.with_structured_output(MetricsSQLResponse)
+    llm_with_structure = _structured(llm, MetricsSQLResponse)
     sql_response = llm_with_structure.invoke(messages)
 
     sql, sql_result, sql_response, last_error = _attempt_sql_execution(
@@ -212,7 +227,7 @@ def metrics_agent_node(state: ObsState, llm, config: Optional[RunnableConfig] =
         llm_with_structure,
         messages,
         request_text,
-        run_sql_tool,
+        run_sql_tool(),
         config,
     )
 
@@ -288,7 +303,7 @@ def metrics_agent_node(state: ObsState, llm, config: Optional[RunnableConfig] =
         )
     )
 
-    llm_with_summary = llm.with_structured_output(MetricsSummaryResponse)
+    llm_with_summary = _structured(llm, MetricsSummaryResponse)
     summary_response = llm_with_summary.invoke([result_system, result_user])
 
     summary_metadata = {
@@ -7,6 +7,7 @@ from ..core.state import ObsState
 from ..utils.diagnostics import (
     DEFAULT_DIAGNOSTIC_WINDOW_HOURS,
     extract_window_hours_from_text,
+    format_step_objective,
     infer_target_metric,
     DIAGNOSTICS_STEP_SPECS,
 )
@@ -110,15 +111,16 @@ def make_diagnostics_plan(
 
     steps: List[PlanStep] = []
     for idx, spec in enumerate(DIAGNOSTICS_STEP_SPECS, start=1):
-        objective = spec["objective_template"].format(
-            metric=target_metric,
-            baseline_hours=baseline_hours,
-            recent_hours=recent_hours,
+        objective = format_step_objective(
+            spec.name,
+            target_metric,
+            baseline_hours,
+            recent_hours,
         )
-        if spec["agent"] == "metrics_agent":
+        if spec.agent == "metrics_agent":
             input_context = {
                 "metric": target_metric,
-                "mode": spec.get("mode", "overall"),
+                "mode": spec.mode or "overall",
                 "baseline_hours": baseline_hours,
                 "recent_hours": recent_hours,
             }
@@ -127,11 +129,11 @@ def make_diagnostics_plan(
         steps.append(
             PlanStep(
                 step_number=idx,
-                name=spec.get("name"),
-                agent=spec["agent"],
+                name=spec.name,
+                agent=spec.agent,
                 objective=objective,
                 input_context=input_context,
-                success_criteria=spec["success"],
+                success_criteria=spec.success,
             )
         )
 
@@ -148,7 +150,7 @@ def make_diagnostics_plan(
     return plan, diag_context
 
 
-def planner_agent_node(state: ObsState, llm) -> ObsState:
+def planner_agent_node(state: ObsState, llm, planner_llm=None) -> ObsState:
     """Create a plan describing which agents should run and in what order."""
     plan_mode = state.get("plan_mode", "default")
 
@@ -171,7 +173,10 @@ def planner_agent_node(state: ObsState, llm) -> ObsState:
                 "- Always order steps logically (metrics before chart if data is needed).\n"
                 "- Every step MUST include step_number, agent, objective, input_context, success_criteria.\n"
                 "- step_number must start at 1 and increment by 1.\n"
-                "- Be explicit: describe the precise data or chart requirements in the objective and context.\n\n"
+                "- Be explicit: describe the precise data or chart requirements in the objective and context.\n"
+                "- If the plan includes a chart_agent step and the chart choice is obvious, also fill\n"
+                "  chart_hints (chart_type, x_field, y_field) so the chart agent can act without\n"
+                "  another model call.\n\n"
                 "Return JSON that matches this template exactly:\n"
                 "{\n"
                 "  \"summary\": \"High-level plan\",\n"
@@ -197,13 +202,25 @@ def planner_agent_node(state: ObsState, llm) -> ObsState:
             )
         )
 
-        planner_llm = llm.with_structured_output(PlannerResponse)
+        if planner_llm is None:
+            planner_llm = llm.with_structured_output(PlannerResponse)
         messages = [system] + state["messages"]
 
         try:
             response = planner_llm.invoke(messages)
             plan_steps = [step.model_dump() for step in response.steps]
             plan_text = _format_plan_text(response.summary, response.steps)
+            # Attach planner-provided hints to the matching steps so the
+            # downstream agents can skip or shorten their own LLM calls.
+            if response.chart_hints is not None:
+                hints = response.chart_hints.model_dump(exclude={"data"})
+                for step in plan_steps:
+                    if step.get("agent") == "chart_agent":
+                        step["chart_hints"] = hints
+            if response.summary_outline:
+                for step in plan_steps:
+                    if step.get("agent") == "diagnostics_summary_agent":
+                        step["summary_outline"] = response.summary_outline
         except Exception as exc:
             plan_steps = _default_plan(state)
             plan_text = (
@@ -1,5 +1,8 @@
 """Routing agent for the observability multi-agent system."""
 
+import functools
+import logging
+import re
 from typing import Any, Optional
 
 from pydantic import BaseModel, Field
@@ -14,6 +17,8 @@ from ..utils.diagnostics import (
     is_diagnostics_intent,
 )
 
+logger = logging.getLogger(__name__)
+
 DISALLOWED_KEYWORDS = [
     "delete",
     "drop",
@@ -39,6 +44,24 @@ ANALYTICS_KEYWORDS = [
     "observability",
 ]
 
+CHART_KEYWORDS = [
+    "chart",
+    "graph",
+    "plot",
+    "visualize",
+    "bar chart",
+    "line chart",
+    "pie chart",
+    "visualization",
+]
+
+# Compiled alternations scan the text once in C instead of one substring
+# search per keyword. Substring (not word-boundary) semantics are kept so
+# e.g. "runs" still matches "run".
+_DISALLOWED_RE = re.compile("|".join(map(re.escape, DISALLOWED_KEYWORDS)))
+_ANALYTICS_RE = re.compile("|".join(map(re.escape, ANALYTICS_KEYWORDS)))
+_CHART_RE = re.compile("|".join(map(re.escape, CHART_KEYWORDS)))
+
 REFUSAL_MESSAGE = (
     "I cannot help with this request as it is either unrelated to observability analysis "
     "or could potentially harm the system. If you need token/metrics/chart analysis, "
@@ -58,14 +81,12 @@ class RoutingDecision(BaseModel):
 
 
 def _extract_last_user_message(state: ObsState) -> Optional[HumanMessage]:
-    return next(
-        (
-            m
-            for m in reversed(state.get("messages", []))
-            if hasattr(m, "type") and m.type == "human" and isinstance(m, HumanMessage)
-        ),
-        None,
-    )
+    # reversed() iterates lazily from the tail and exits at the first human
+    # message, so this is O(distance to the latest human turn) with no copies.
+    for m in reversed(state.get("messages", [])):
+        if getattr(m, "type", "") == "human" and isinstance(m, HumanMessage):
+            return m
+    return None
 
 
 def _enter_diagnostics_mode(
@@ -86,58 +107,60 @@ def _enter_diagnostics_mode(
         "recent_window_hours": window_hours,
         "results": [],
     }
-    print("🧭 Routing: planner (diagnostics mode)")
+    logger.debug("🧭 Routing: planner (diagnostics mode)")
     return True
 
 
-def _is_disallowed_request(text: str) -> bool:
-    lowered = (text or "").lower()
-    return any(keyword in lowered for keyword in DISALLOWED_KEYWORDS)
+def _is_disallowed_request(lowered: str) -> bool:
+    return _DISALLOWED_RE.search(lowered) is not None
 
 
-def _is_analytics_request(text: str) -> bool:
-    lowered = (text or "").lower()
-    return any(keyword in lowered for keyword in ANALYTICS_KEYWORDS)
+def _is_analytics_request(lowered: str) -> bool:
+    return _ANALYTICS_RE.search(lowered) is not None
 
 
-def _route_default_flow(state: ObsState, llm, user_text: str) -> AgentName:
-    text = (user_text or "").lower()
+def _route_default_flow(state: ObsState, llm, lowered_text: str, routing_llm=None) -> AgentName:
+    text = lowered_text
     has_data = bool(state.get("last_rows"))
 
-    chart_keywords = [
-        "chart",
-        "graph",
-        "plot",
-        "visualize",
-        "bar chart",
-        "line chart",
-        "pie chart",
-        "visualization",
-    ]
-    matched_chart_keyword = next((kw for kw in chart_keywords if kw in text), None)
-    if matched_chart_keyword:
+    chart_match = _CHART_RE.search(text)
+    if chart_match:
         if has_data:
-            print(f"🧭 Routing: chart_agent (keyword match '{matched_chart_keyword}')")
+            logger.debug("🧭 Routing: chart_agent (keyword match %r)", chart_match.group(0))
             return "chart_agent"
-        print(
+        logger.debug(
             "🧭 Routing: planner (chart keyword detected but no cached data; "
             "need plan to fetch data before chart)"
         )
         return "planner"
 
-    context_hint = SystemMessage(
-        content=(
-            "Context: last_rows_available="
-            f"{has_data}. This flag only indicates whether recent data rows exist; "
-            "it should NOT override the keyword rule above. Unless the user explicitly "
-            "asks for a chart/graph/visualization, continue to favor metrics_agent."
-            " When the request clearly requires multiple actions (e.g., run a query"
-            " and then visualize it), call the planner so it can orchestrate steps."
-        )
-    )
+    # Deterministic path: a plain analytics question with no multi-action
+    # phrasing always lands on metrics_agent, so skip the LLM round-trip.
+    if _is_analytics_request(text) and not any(
+        marker in text for marker in _MULTI_ACTION_MARKERS
+    ):
+        logger.debug("🧭 Routing: metrics_agent (deterministic analytics path)")
+        return "metrics_agent"
 
-    system_prompt = SystemMessage(
-        content="""You are a routing agent for an observability system.
+    normalized = re.sub(r"\s+", " ", text.strip())
+    try:
+        if routing_llm is None:
+            # Fallback for callers that pass a bare llm; chat models are not
+            # hashable, so this binding cannot be cached on the model itself.
+            routing_llm = llm.with_structured_output(RoutingDecision)
+        # Long messages are unlikely to repeat verbatim; don't pollute the cache.
+        if len(normalized) > 512:
+            return _llm_route.__wrapped__(routing_llm, normalized, has_data)
+        return _llm_route(routing_llm, normalized, has_data)
+    except Exception as exc:
+        logger.warning("⚠️  Routing error: %s, defaulting to metrics_agent", exc)
+        return "metrics_agent"
+
+
+_MULTI_ACTION_MARKERS = ("and then", "then visualize", ",")
+
+_ROUTING_SYSTEM_PROMPT = SystemMessage(
+    content="""You are a routing agent for an observability system.
 
 CRITICAL RULES:
 - If user explicitly mentions "chart", "graph", "visualize", or "plot"
@@ -156,55 +179,71 @@ Available agents:
    - Use when user explicitly wants charts/graphs and data already exists
 
 Return your decision with reasoning."""
+)
+
+
+@functools.lru_cache(maxsize=1024)
+def _llm_route(routing_llm, normalized_text: str, has_data: bool) -> AgentName:
+    """Ask the LLM to route an ambiguous message; cached per normalized text."""
+    context_hint = SystemMessage(
+        content=(
+            "Context: last_rows_available="
+            f"{has_data}. This flag only indicates whether recent data rows exist; "
+            "it should NOT override the keyword rule above. Unless the user explicitly "
+            "asks for a chart/graph/visualization, continue to favor metrics_agent."
+            " When the request clearly requires multiple actions (e.g., run a query"
+            " and then visualize it), call the planner so it can orchestrate steps."
+        )
     )
 
-    llm_with_structure = llm.with_structured_output(RoutingDecision)
-    messages = [context_hint, system_prompt] + state["messages"]
+    messages = [context_hint, _ROUTING_SYSTEM_PROMPT, HumanMessage(content=normalized_text)]
 
-    try:
-        decision = llm_with_structure.invoke(messages)
-        print(f"🧭 Routing (LLM): {decision.agent} - {decision.reasoning}")
-        return decision.agent
-    except Exception as exc:
-        print(f"⚠️  Routing error: {exc}, defaulting to metrics_agent")
-        return "metrics_agent"
+    decision = routing_llm.invoke(messages)
+    logger.debug("🧭 Routing (LLM): %s - %s", decision.agent, decision.reasoning)
+    return decision.agent
 
 
-def route_from_user_message(state: ObsState, llm) -> tuple[AgentName, Optional[AIMessage]]:
+def route_from_user_message(
+    state: ObsState, llm, routing_llm=None
+) -> tuple[AgentName, Optional[AIMessage]]:
     """
     Route initial user message across diagnostics/planner/metrics/chart agents.
     Returns tuple of (agent_name, optional_refusal_message).
     """
     last_user_msg = _extract_last_user_message(state)
     if not last_user_msg:
-        print("⚠️  No user message found, defaulting to metrics_agent")
+        logger.warning("⚠️  No user message found, defaulting to metrics_agent")
         return "metrics_agent", None
 
     user_text = last_user_msg.content if isinstance(last_user_msg.content, str) else ""
     if not user_text:
         return "metrics_agent", None
 
-    if _is_disallowed_request(user_text):
-        print("🚫 Router: Disallowed request detected, refusing")
+    lowered = user_text.lower()
+
+    if _is_disallowed_request(lowered):
+        logger.debug("🚫 Router: Disallowed request detected, refusing")
         return "complete", AIMessage(content=REFUSAL_MESSAGE)
 
-    if not _is_analytics_request(user_text):
-        print("🚫 Router: Irrelevant request detected, refusing")
+    if not _is_analytics_request(lowered):
+        logger.debug("🚫 Router: Irrelevant request detected, refusing")
         return "complete", AIMessage(content=REFUSAL_MESSAGE)
 
-    if _enter_diagnostics_mode(state, user_text):
+    # Pass the lowered text so the memoized diagnostics helpers share one
+    # cache key per message with any other caller.
+    if _enter_diagnostics_mode(state, lowered):
         return "planner", None
 
-    return _route_default_flow(state, llm, user_text), None
+    return _route_default_flow(state, llm, lowered, routing_llm), None
 
 
-def router_agent_node(state: ObsState, llm) -> ObsState:
+def router_agent_node(state: ObsState, llm, routing_llm=None) -> ObsState:
     """
     LLM-based router agent that intelligently determines which agent to use.
     """
     # Check if previous agent encountered a fatal error
     if state.get("has_error", False):
-        print("⚠️  Fatal error detected, stopping execution")
+        logger.warning("⚠️  Fatal error detected, stopping execution")
         return agent_state_update(
             state,
             messages=[],
@@ -222,10 +261,14 @@ def router_agent_node(state: ObsState, llm) -> ObsState:
         step = plan_steps[step_index]
         agent_name = step.get("agent", "metrics_agent")
         objective = step.get("objective", "")
-        print(
-            f"🧭 Planner routing: step {step_index + 1}/{len(plan_steps)} → {agent_name}"
-            + (f" ({objective})" if objective else "")
-        )
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "🧭 Planner routing: step %d/%d → %s%s",
+                step_index + 1,
+                len(plan_steps),
+                agent_name,
+                f" ({objective})" if objective else "",
+            )
     elif plan_steps and step_index >= len(plan_steps):
         return agent_state_update(
             state,
@@ -245,7 +288,7 @@ def router_agent_node(state: ObsState, llm) -> ObsState:
             plan_mode="default",
         )
     else:
-        agent_name, refusal_message = route_from_user_message(state, llm)
+        agent_name, refusal_message = route_from_user_message(state, llm, routing_llm)
         plan_steps = state.get("plan", []) or []
         step_index = state.get("plan_step_index", 0)
 
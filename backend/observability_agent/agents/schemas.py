@@ -88,3 +88,17 @@ class PlannerResponse(BaseModel):
     steps: List[PlanStep] = Field(
         description="Ordered list of steps to execute"
     )
+    chart_hints: Optional[ChartSpecResponse] = Field(
+        default=None,
+        description=(
+            "Optional chart type/axis hints for a chart_agent step, so the "
+            "chart agent can skip its own LLM call"
+        )
+    )
+    summary_outline: Optional[str] = Field(
+        default=None,
+        description=(
+            "Optional outline for a diagnostics_summary_agent step to follow, "
+            "keeping its response short"
+        )
+    )
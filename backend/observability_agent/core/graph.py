@@ -1,14 +1,18 @@
 """LangGraph workflow definition for the observability agent system."""
 
-from functools import partial
 from langgraph.graph import StateGraph, START, END
 
 from .state import ObsState
-from ..agents.router import router_agent_node
+from ..agents.router import router_agent_node, RoutingDecision
 from ..agents.metrics import metrics_agent_node
 from ..agents.chart import chart_agent_node
 from ..agents.planner import planner_agent_node
 from ..agents.diagnostics_summary import diagnostics_summary_agent_node
+from ..agents.schemas import ChartSpecResponse, PlannerResponse
+
+# Built once; route_from_state runs on every router exit and must not pay
+# for set construction each time.
+_VALID_AGENTS = frozenset({"metrics_agent", "chart_agent", "diagnostics_summary_agent"})
 
 
 def build_graph(llm):
@@ -30,12 +34,29 @@ def build_graph(llm):
     """
     workflow = StateGraph(ObsState)
 
-    # Bind the LLM to each agent node using partial
-    planner_node = partial(planner_agent_node, llm=llm)
-    router_node = partial(router_agent_node, llm=llm)
-    metrics_node = partial(metrics_agent_node, llm=llm)
-    chart_node = partial(chart_agent_node, llm=llm)
-    diagnostics_node = partial(diagnostics_summary_agent_node, llm=llm)
+    # Bind structured-output chains once per graph; with_structured_output
+    # regenerates the pydantic/tool-calling schema each time it is called,
+    # which is pure overhead when repeated on every node tick.
+    routing_llm = llm.with_structured_output(RoutingDecision)
+    planner_llm = llm.with_structured_output(PlannerResponse)
+    chart_llm = llm.with_structured_output(ChartSpecResponse)
+
+    # Bind the LLM (and prebuilt chains) to each agent node via closures;
+    # plain closures dispatch faster than functools.partial's kwargs merge.
+    def planner_node(state: ObsState) -> ObsState:
+        return planner_agent_node(state, llm, planner_llm=planner_llm)
+
+    def router_node(state: ObsState) -> ObsState:
+        return router_agent_node(state, llm, routing_llm=routing_llm)
+
+    def metrics_node(state: ObsState) -> ObsState:
+        return metrics_agent_node(state, llm)
+
+    async def chart_node(state: ObsState) -> ObsState:
+        return await chart_agent_node(state, llm, llm_with_structure=chart_llm)
+
+    async def diagnostics_node(state: ObsState) -> ObsState:
+        return await diagnostics_summary_agent_node(state, llm)
 
     # Add nodes
     workflow.add_node("planner", planner_node)
@@ -51,11 +72,7 @@ def build_graph(llm):
     def route_from_state(state: ObsState) -> str:
         plan = state.get("plan", []) or []
         idx = state.get("plan_step_index", 0)
-        valid_agents = {
-            "metrics_agent",
-            "chart_agent",
-            "diagnostics_summary_agent",
-        }
+        valid_agents = _VALID_AGENTS
 
         if plan and idx < len(plan):
             agent = plan[idx].get("agent", "metrics_agent")
@@ -2,7 +2,8 @@
 
 from __future__ import annotations
 
-from typing import Any, List
+import sys
+from typing import Any, Dict, List
 
 from .state import ObsState
 
@@ -13,25 +14,29 @@ def agent_state_update(
     messages: List[Any] | None = None,
     active_agent: str | None = None,
     **updates: Any,
-) -> ObsState:
+) -> Dict[str, Any]:
     """
-    Build a state update dict that preserves frequently reused fields.
+    Build a minimal state delta containing only the keys this agent changed.
+
+    LangGraph merges partial updates into the persistent state itself, so
+    echoing unchanged fields back (as this helper used to) only added dict
+    churn on every node tick. `state` stays in the signature so call sites
+    keep their shape, and remains available should a field ever need to be
+    derived from the previous snapshot.
 
     Args:
         state: Current state snapshot
-        messages: New messages this agent emits (default empty list)
+        messages: New messages this agent emits (omitted when empty)
         active_agent: Name of the agent producing this update
         updates: Additional overrides (plan, last_rows, etc.)
     """
-    response: ObsState = {
-        "messages": messages or [],
-        "active_agent": active_agent or state.get("active_agent", "router"),
-        "last_rows": state.get("last_rows", []),
-        "plan": state.get("plan", []),
-        "plan_step_index": state.get("plan_step_index", 0),
-        "plan_mode": state.get("plan_mode", "default"),
-        "diagnostics_context": state.get("diagnostics_context", {"results": []}),
-        "has_error": state.get("has_error", False),
-    }
+    response: Dict[str, Any] = {}
+    if messages:
+        response["messages"] = messages
+    if active_agent is not None:
+        # Agent names arriving from LLM output or deserialized JSON are not
+        # interned; interning here makes the router's equality checks and any
+        # dict lookups on the name identity-fast.
+        response["active_agent"] = sys.intern(active_agent)
     response.update(updates)
     return response
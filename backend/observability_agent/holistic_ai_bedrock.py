@@ -3,6 +3,7 @@
 This is a self-contained wrapper that can be used in tutorials without importing from ../core.
 """
 
+import asyncio
 import os
 import json
 import requests
@@ -418,6 +419,11 @@ class HolisticAIBedrockStructuredOutput:
         except Exception as e:
             raise ValueError(f"Failed to validate structured output: {e}\nContent: {content}")
     
+    async def ainvoke(self, input: Any, config: Optional[Any] = None, **kwargs: Any) -> PydanticBaseModel:
+        """Async invoke; the underlying HTTP request is blocking, so it runs
+        in a worker thread instead of stalling the event loop."""
+        return await asyncio.to_thread(self.invoke, input, config, **kwargs)
+
     def __call__(self, input: Any, **kwargs: Any) -> PydanticBaseModel:
         """Make the wrapper callable."""
         return self.invoke(input, **kwargs)
@@ -1,13 +1,14 @@
 """Observability tools: schema helpers, database runner, chart formatter."""
 
 from .schema import get_observability_schema, get_observability_schema_tool
-from .database import run_sql, run_sql_tool
+from .database import run_sql, run_sql_async, run_sql_tool
 from .chart_formatter import prepare_chart_data, prepare_chart_data_tool
 
 __all__ = [
     "get_observability_schema",
     "get_observability_schema_tool",
     "run_sql",
+    "run_sql_async",
     "run_sql_tool",
     "prepare_chart_data",
     "prepare_chart_data_tool",
@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+from functools import lru_cache
 from typing import Any, Dict, Iterable, List, Optional, Sequence
 from langchain_core.tools import StructuredTool
 
@@ -26,6 +27,24 @@ LABEL_HINTS = [
     "status",
 ]
 
+# Label columns that look temporal get a line chart; anything else
+# categorical gets a bar chart.
+TEMPORAL_HINTS = [
+    "time",
+    "date",
+    "timestamp",
+    "hour",
+    "day",
+    "week",
+    "month",
+]
+
+
+def _suggest_chart(label_key: Optional[str]) -> str:
+    if label_key and any(hint in label_key.lower() for hint in TEMPORAL_HINTS):
+        return "line"
+    return "bar"
+
 
 def _is_numeric(value: Any) -> bool:
     """Return True for ints/floats (but not bool)."""
@@ -113,6 +132,7 @@ def prepare_chart_data(
                 "rows_considered": 0,
                 "rows_returned": 0,
                 "suggested_chart": "bar",
+                "suggestion_derived": False,
             },
         }
 
@@ -144,7 +164,11 @@ def prepare_chart_data(
         "value_source_column": value_key,
         "rows_considered": len(rows),
         "rows_returned": len(cleaned_rows),
-        "suggested_chart": "bar",
+        # Derived from the selected label column (temporal -> line,
+        # categorical -> bar); suggestion_derived tells consumers the
+        # suggestion reflects the data rather than a default.
+        "suggested_chart": _suggest_chart(label_key),
+        "suggestion_derived": True,
     }
 
     # If we couldn't materialize chart rows, fall back to the originals.
@@ -178,8 +202,12 @@ def _prepare_chart_data_tool(
     )
 
 
-prepare_chart_data_tool = StructuredTool.from_function(
-    func=_prepare_chart_data_tool,
-    name="prepare_chart_data",
-    description="Normalize tabular rows for charting (returns cleaned rows and metadata).",
-)
+# Lazy so the pydantic tool-schema generation happens on first use, not at
+# package import.
+@lru_cache(maxsize=1)
+def prepare_chart_data_tool() -> StructuredTool:
+    return StructuredTool.from_function(
+        func=_prepare_chart_data_tool,
+        name="prepare_chart_data",
+        description="Normalize tabular rows for charting (returns cleaned rows and metadata).",
+    )
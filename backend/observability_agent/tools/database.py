@@ -1,9 +1,15 @@
 """Database query execution tools (SQLite implementation)."""
 
+import asyncio
+import hashlib
+import os
 import sqlite3
 import re
+import threading
 import time
+from collections import OrderedDict
 from datetime import datetime, timezone
+from functools import lru_cache
 from typing import Dict, Any, Optional
 from pathlib import Path
 from langchain_core.tools import StructuredTool
@@ -12,6 +18,99 @@ from langchain_core.tools import StructuredTool
 # Database path relative to project root
 DB_PATH = Path("/app/data/agent_debug_db.sqlite")
 
+# Compiled once; run_sql is called for every metrics query and these patterns
+# were previously recompiled (or at best re-fetched from re's cache) per call.
+_LIMIT_RE = re.compile(r"\bLIMIT\b", re.IGNORECASE)
+_LIMIT_VAL_RE = re.compile(r"\bLIMIT\s+(\d+)", re.IGNORECASE)
+
+# Rows are pulled from SQLite in batches of this size rather than in one
+# fetchall, which keeps peak memory bounded for JSON-heavy result sets.
+FETCH_BATCH_SIZE = 256
+
+# Full SQL text in metadata gets serialized into every state snapshot, which
+# adds up across a session; unless OBS_DEBUG=1, metadata carries only a short
+# hash and the text is kept here for post-hoc lookup via get_sql_text.
+_DEBUG_SQL_METADATA = os.environ.get("OBS_DEBUG") == "1"
+_SQL_TEXTS: "OrderedDict[str, str]" = OrderedDict()
+_SQL_TEXTS_MAX = 256
+
+
+def _sql_digest(sql: str) -> str:
+    digest = hashlib.blake2b(sql.encode(), digest_size=8).hexdigest()
+    if digest not in _SQL_TEXTS:
+        _SQL_TEXTS[digest] = sql
+        if len(_SQL_TEXTS) > _SQL_TEXTS_MAX:
+            _SQL_TEXTS.popitem(last=False)
+    return digest
+
+
+def get_sql_text(digest: str) -> Optional[str]:
+    """Resolve a metadata sql_hash back to the executed SQL, if still cached."""
+    return _SQL_TEXTS.get(digest)
+
+
+# datetime.now(timezone.utc).isoformat() costs a syscall plus object and
+# string construction per call; queries fired back-to-back within the same
+# millisecond reuse the formatted stamp instead.
+_LAST_STAMP_MS = 0
+_LAST_STAMP_ISO = ""
+
+
+def _utc_now_iso() -> str:
+    global _LAST_STAMP_MS, _LAST_STAMP_ISO
+    now_ms = time.time_ns() // 1_000_000
+    if now_ms != _LAST_STAMP_MS:
+        _LAST_STAMP_ISO = datetime.fromtimestamp(
+            now_ms / 1000.0, timezone.utc
+        ).isoformat(timespec="milliseconds")
+        _LAST_STAMP_MS = now_ms
+    return _LAST_STAMP_ISO
+
+# One read-only connection per process: opening a fresh connection per query
+# pays connect/close syscalls and a cold page cache every time. The RLock
+# both protects lazy init and serializes cursor use across agent threads.
+_CONN: Optional[sqlite3.Connection] = None
+_DB_LOCK = threading.RLock()
+
+_READ_PRAGMAS = (
+    "PRAGMA query_only=1",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-65536",
+    "PRAGMA mmap_size=268435456",
+)
+
+
+def _get_conn() -> sqlite3.Connection:
+    """Lazily open the shared read-only connection with tuned pragmas."""
+    global _CONN
+    with _DB_LOCK:
+        if _CONN is None:
+            conn = sqlite3.connect(
+                f"file:{DB_PATH}?mode=ro", uri=True, check_same_thread=False
+            )
+            cursor = conn.cursor()
+            for pragma in _READ_PRAGMAS:
+                cursor.execute(pragma)
+            cursor.close()
+            _CONN = conn
+        return _CONN
+
+
+def _db_stamp() -> int:
+    """Return a stamp that changes whenever another connection commits.
+
+    PRAGMA data_version increments on every commit made by other
+    connections, including WAL commits that have not yet been checkpointed
+    into the main database file — whose mtime therefore cannot be used to
+    invalidate cached query results.
+    """
+    with _DB_LOCK:
+        cursor = _get_conn().cursor()
+        try:
+            return cursor.execute("PRAGMA data_version").fetchone()[0]
+        finally:
+            cursor.close()
+
 
 def _ensure_limit(sql: str, default_limit: int = 100) -> str:
     """
@@ -25,7 +124,7 @@ def _ensure_limit(sql: str, default_limit: int = 100) -> str:
         SQL with LIMIT clause
     """
     # Check if LIMIT already exists (case-insensitive)
-    if not re.search(r"\bLIMIT\b", sql, re.IGNORECASE):
+    if not _LIMIT_RE.search(sql):
         # Add LIMIT at the end
         sql = sql.rstrip(";").strip() + f" LIMIT {default_limit}"
     return sql
@@ -33,7 +132,7 @@ def _ensure_limit(sql: str, default_limit: int = 100) -> str:
 
 def _extract_limit_value(sql: str) -> Optional[int]:
     """Extract LIMIT value if present."""
-    match = re.search(r"\bLIMIT\s+(\d+)", sql, re.IGNORECASE)
+    match = _LIMIT_VAL_RE.search(sql)
     if match:
         try:
             return int(match.group(1))
@@ -74,56 +173,78 @@ def run_sql(sql: str) -> Dict[str, Any]:
         )
 
     original_sql = sql
-    had_limit = bool(re.search(r"\bLIMIT\b", original_sql, re.IGNORECASE))
+    had_limit = _LIMIT_RE.search(original_sql) is not None
 
-    # Ensure query has LIMIT for safety
-    sql = _ensure_limit(sql)
+    # Ensure query has LIMIT for safety; skip the re-scan when we already know
+    if not had_limit:
+        sql = _ensure_limit(sql)
+
+    # Normalize whitespace only for the cache key — case is preserved because
+    # string literals in the SQL are case-sensitive. The data_version stamp
+    # in the key invalidates entries whenever the webhook ingests new traces.
+    sql_norm = " ".join(sql.split()).rstrip(";")
+    db_stamp = _db_stamp()
+
+    columns, rows, executed_sql, latency_ms = _execute_cached(sql_norm, db_stamp)
+
+    query_metadata = {
+        "rows_returned": len(rows),
+        "columns_returned": len(columns),
+        # A LIMIT is always present here: either the caller's or ours.
+        "limit_applied": True,
+        "auto_limit_added": not had_limit,
+        "limit_value": _extract_limit_value(sql),
+        "execution_ms": round(latency_ms, 3),
+        "queried_at": _utc_now_iso(),
+    }
+    if _DEBUG_SQL_METADATA:
+        query_metadata["executed_sql"] = executed_sql
+        query_metadata["original_sql"] = original_sql
+        query_metadata["database_path"] = str(DB_PATH)
+    else:
+        query_metadata["sql_hash"] = _sql_digest(executed_sql)
+
+    return {
+        "columns": columns,
+        "rows": rows,
+        "metadata": query_metadata,
+    }
 
+
+@lru_cache(maxsize=512)
+def _execute_cached(sql: str, db_stamp: int):
+    """Run a normalized read-only query; identical SQL against an unchanged
+    database (diagnostics plans repeat the same steps) skips SQLite entirely.
+    Errors propagate and are not cached."""
     print("Executing SQL:")
     print(sql)
     print("--------")
 
     try:
-        # Connect in READ-ONLY mode
-        conn = sqlite3.connect(f"file:{DB_PATH}?mode=ro", uri=True)
-        cursor = conn.cursor()
-
-        # Execute query and capture latency
-        start_time = time.perf_counter()
-        cursor.execute(sql)
+        with _DB_LOCK:
+            cursor = _get_conn().cursor()
+            try:
+                # Execute query and capture latency
+                start_time = time.perf_counter()
+                cursor.execute(sql)
 
-        # Get column names
-        columns = [desc[0] for desc in cursor.description] if cursor.description else []
+                # Get column names
+                columns = (
+                    [desc[0] for desc in cursor.description] if cursor.description else []
+                )
 
-        # Fetch all rows
-        rows = cursor.fetchall()
-        latency_ms = (time.perf_counter() - start_time) * 1000.0
-
-        # Close connection
-        cursor.close()
-        conn.close()
+                # Fetch rows in bounded batches
+                cursor.arraysize = FETCH_BATCH_SIZE
+                rows = []
+                while batch := cursor.fetchmany():
+                    rows.extend(batch)
+                latency_ms = (time.perf_counter() - start_time) * 1000.0
+            finally:
+                cursor.close()
 
         print(f"Retrieved {len(rows)} rows")
         print("--------")
-
-        query_metadata = {
-            "executed_sql": sql,
-            "original_sql": original_sql,
-            "rows_returned": len(rows),
-            "columns_returned": len(columns),
-            "limit_applied": bool(re.search(r"\bLIMIT\b", sql, re.IGNORECASE)),
-            "auto_limit_added": not had_limit,
-            "limit_value": _extract_limit_value(sql),
-            "execution_ms": round(latency_ms, 3),
-            "database_path": str(DB_PATH),
-            "queried_at": datetime.now(timezone.utc).isoformat(),
-        }
-
-        return {
-            "columns": columns,
-            "rows": rows,
-            "metadata": query_metadata,
-        }
+        return columns, rows, sql, latency_ms
 
     except sqlite3.Error as e:
         print(f"SQL Error: {e}")
@@ -131,16 +252,61 @@ def run_sql(sql: str) -> Dict[str, Any]:
         raise
 
 
+async def run_sql_async(sql: str) -> Dict[str, Any]:
+    """
+    Async wrapper around run_sql for callers on the event loop.
+
+    Runs the blocking sqlite3 work in a worker thread (the same pattern the
+    API layer uses) so independent queries can overlap with LLM calls and
+    each other instead of blocking the loop.
+    """
+    return await asyncio.to_thread(run_sql, sql)
+
+
+def run_sql_stream(sql: str):
+    """
+    Execute a read-only query and stream the results.
+
+    Yields the column-name list first, then row batches of up to
+    FETCH_BATCH_SIZE tuples, without materializing the full result set.
+    The shared connection lock is held until the generator is exhausted or
+    closed, so consume it promptly. Results are not cached.
+    """
+    if not DB_PATH.exists():
+        raise FileNotFoundError(
+            f"Database not found at {DB_PATH}. " f"Expected: backend/agent_debug_db.sqlite"
+        )
+
+    sql = _ensure_limit(sql)
+
+    with _DB_LOCK:
+        cursor = _get_conn().cursor()
+        try:
+            cursor.execute(sql)
+            columns = [desc[0] for desc in cursor.description] if cursor.description else []
+            yield columns
+            cursor.arraysize = FETCH_BATCH_SIZE
+            while batch := cursor.fetchmany():
+                yield batch
+        finally:
+            cursor.close()
+
+
 def _run_sql_tool(sql: str) -> Dict[str, Any]:
     """Wrapper so run_sql can be exposed as a LangChain tool."""
     return run_sql(sql)
 
 
-run_sql_tool = StructuredTool.from_function(
-    func=_run_sql_tool,
-    name="run_sql",
-    description=(
-        "Execute a read-only SQL query against the observability SQLite database "
-        "and return columns, rows, and metadata."
-    ),
-)
+# Building the StructuredTool triggers pydantic schema generation; deferring
+# it keeps `import observability_agent` cheap for callers that never run the
+# agent (scripts, the webhook path).
+@lru_cache(maxsize=1)
+def run_sql_tool() -> StructuredTool:
+    return StructuredTool.from_function(
+        func=_run_sql_tool,
+        name="run_sql",
+        description=(
+            "Execute a read-only SQL query against the observability SQLite database "
+            "and return columns, rows, and metadata."
+        ),
+    )
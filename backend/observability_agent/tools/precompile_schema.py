@@ -0,0 +1,21 @@
+"""Write the observability schema description to a static artifact.
+
+Usage:
+    python -m observability_agent.tools.precompile_schema
+
+Builds the Text2SQL schema string from the live database and writes it to
+schema.txt next to the schema module, so runtime processes can load it
+without touching SQLite. Re-run after any schema migration.
+"""
+
+from .schema import SCHEMA_TXT, build_observability_schema
+
+
+def main() -> None:
+    schema = build_observability_schema()
+    SCHEMA_TXT.write_text(schema + "\n")
+    print(f"Wrote {len(schema)} characters to {SCHEMA_TXT}")
+
+
+if __name__ == "__main__":
+    main()
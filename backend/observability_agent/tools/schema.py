@@ -1,13 +1,22 @@
 """Database schema definition for observability tools."""
 
-import sqlite3
+import os
 from functools import lru_cache
-from typing import Dict, List
+from pathlib import Path
+from types import MappingProxyType
+from typing import Dict, List, Mapping
 from langchain_core.tools import StructuredTool
 
-from .database import DB_PATH
+from .database import _DB_LOCK, _get_conn
 
-TABLE_DESCRIPTIONS: Dict[str, str] = {
+# Precompiled schema artifact written by `python -m
+# observability_agent.tools.precompile_schema`. The schema is static for a
+# deployment, so reading this file avoids the SQLite PRAGMA round-trip on the
+# first prompt of every process. Set OBS_SCHEMA_REFRESH=1 to force a live
+# rebuild (e.g. after a migration).
+SCHEMA_TXT = Path(__file__).with_name("schema.txt")
+
+TABLE_DESCRIPTIONS: Mapping[str, str] = MappingProxyType({
     "agent_runs": (
         "Agent-level metadata. Use for run status, user/session IDs, timings, "
         "and tags. Join with call_* tables on run_id."
@@ -24,27 +33,31 @@ TABLE_DESCRIPTIONS: Dict[str, str] = {
         "Higher-level chain executions (LangGraph/LangChain). Useful for tracing "
         "chain-level token usage and messages."
     ),
-}
+})
 
 
-def _fetch_columns(table: str) -> List[Dict[str, str]]:
+def _fetch_all_columns() -> Dict[str, List[tuple]]:
+    """Load raw table_info rows for every table in one locked cursor round."""
+    columns: Dict[str, List[tuple]] = {}
     try:
-        conn = sqlite3.connect(f"file:{DB_PATH}?mode=ro", uri=True)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        cursor.execute(f"PRAGMA table_info({table})")
-        rows = cursor.fetchall()
-        cursor.close()
-        conn.close()
-        return [{"name": row["name"], "type": row["type"]} for row in rows]
+        with _DB_LOCK:
+            cursor = _get_conn().cursor()
+            try:
+                for table in TABLE_DESCRIPTIONS:
+                    cursor.execute(f"PRAGMA table_info({table})")
+                    columns[table] = cursor.fetchall()
+            finally:
+                cursor.close()
     except Exception:
-        return []
+        return {table: [] for table in TABLE_DESCRIPTIONS}
+    return columns
 
 
-def _format_table_section(table: str) -> str:
-    columns = _fetch_columns(table)
+def _format_table_section(table: str, columns: List[tuple]) -> str:
+    # table_info rows are (cid, name, type, notnull, dflt_value, pk); format
+    # straight from the tuples — intermediate dicts were immediate garbage.
     column_lines = "\n".join(
-        f"      - {col['name']} {col['type'] or ''}".rstrip() for col in columns
+        f"      - {row[1]} {row[2] or ''}".rstrip() for row in columns
     ) or "      - (no columns fetched)"
     description = TABLE_DESCRIPTIONS.get(table, "")
     desc_line = f"    Description: {description}\n" if description else ""
@@ -60,10 +73,23 @@ def get_observability_schema() -> str:
     """
     Returns DB schema as a string for Text2SQL agent reference.
 
+    Prefers the precompiled SCHEMA_TXT artifact when present; falls back to
+    a live query of the database otherwise.
+
     Returns:
         Schema description as a formatted string
     """
-    table_sections = "\n".join(_format_table_section(tbl) for tbl in TABLE_DESCRIPTIONS)
+    if os.environ.get("OBS_SCHEMA_REFRESH") != "1" and SCHEMA_TXT.exists():
+        return SCHEMA_TXT.read_text().strip()
+    return build_observability_schema()
+
+
+def build_observability_schema() -> str:
+    """Build the schema description from the live database."""
+    all_columns = _fetch_all_columns()
+    table_sections = "\n".join(
+        _format_table_section(tbl, all_columns.get(tbl, [])) for tbl in TABLE_DESCRIPTIONS
+    )
 
     guidance = """
     IMPORTANT NOTES:
@@ -98,8 +124,12 @@ def _fetch_schema_tool() -> str:
     return get_observability_schema()
 
 
-get_observability_schema_tool = StructuredTool.from_function(
-    func=_fetch_schema_tool,
-    name="get_observability_schema",
-    description="Return the latest observability database schema description for Text2SQL prompts.",
-)
+# Lazy so the pydantic tool-schema generation happens on first use, not at
+# package import.
+@lru_cache(maxsize=1)
+def get_observability_schema_tool() -> StructuredTool:
+    return StructuredTool.from_function(
+        func=_fetch_schema_tool,
+        name="get_observability_schema",
+        description="Return the latest observability database schema description for Text2SQL prompts.",
+    )
@@ -1,9 +1,10 @@
 """Utility functions: SQL parsing and agent runner."""
 
 from .sql_parser import extract_sql_from_text
-from .runner import run_obs_agent
+from .runner import run_obs_agent, arun_obs_agent
 
 __all__ = [
     "extract_sql_from_text",
     "run_obs_agent",
+    "arun_obs_agent",
 ]
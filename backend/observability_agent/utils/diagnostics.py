@@ -1,52 +1,79 @@
 """Shared helpers for diagnostics intent and configuration."""
 
 import re
-from typing import Any, Dict, List, Optional
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Dict, FrozenSet, Mapping, NamedTuple, Optional, Tuple
 
 DEFAULT_DIAGNOSTIC_WINDOW_HOURS = 24
 
-_CAUSE_SIGNALS = [
-    "why",
-    "reason",
-    "cause",
-    "diagnostic",
-    "root cause",
-    "increase",
-    "spike",
-    "sudden",
-    "slow",
-    "unstable",
-]
-
-_METRIC_SIGNALS = [
-    "latency",
-    "response time",
-    "delay",
-    "tokens",
-    "token",
-    "token usage",
-    "cost",
-]
-
-_LATENCY_KEYWORDS = ["latency", "delay", "slow", "response time"]
-_TOKEN_KEYWORDS = ["token", "tokens", "token usage", "cost", "usage"]
-
-
+# Keyword classes are frozensets of single tokens; matching is one \w+ scan
+# over the text plus a set intersection per class, instead of a substring
+# scan per keyword. Multi-word phrases keep a small substring fallback.
+_CAUSE_WORDS = frozenset({
+    "why", "reason", "reasons", "cause", "causes", "caused",
+    "diagnostic", "diagnostics",
+    "increase", "increases", "increased", "increasing",
+    "spike", "spikes", "spiked", "spiking", "sudden", "suddenly",
+    "slow", "slows", "slower", "slowly", "slowness",
+    "slowdown", "slowdowns", "unstable",
+})
+_CAUSE_PHRASES = ("root cause",)
+
+_METRIC_WORDS = frozenset({
+    "latency", "delay", "delays", "delayed", "delaying",
+    "token", "tokens", "cost", "costs", "costly", "costing",
+})
+_METRIC_PHRASES = ("response time", "token usage")
+
+_LATENCY_WORDS = frozenset({
+    "latency", "delay", "delays", "delayed", "delaying",
+    "slow", "slows", "slower", "slowly", "slowness",
+    "slowdown", "slowdowns",
+})
+_LATENCY_PHRASES = ("response time",)
+
+_TOKEN_WORDS = frozenset({
+    "token", "tokens", "cost", "costs", "costly", "costing", "usage",
+})
+
+_WORD_RE = re.compile(r"\w+")
+_HOUR_RE = re.compile(r"(\d+)\s*(hour|hours)", re.IGNORECASE)
+_DAY_RE = re.compile(r"(\d+)\s*(day|days)", re.IGNORECASE)
+
+
+def _class_match(
+    lowered: str,
+    tokens: FrozenSet[str],
+    words: FrozenSet[str],
+    phrases: Tuple[str, ...] = (),
+) -> bool:
+    if not words.isdisjoint(tokens):
+        return True
+    return any(phrase in lowered for phrase in phrases)
+
+
+# Pure functions of their text argument, and the router and planner call them
+# repeatedly on the same message — memoize at the definition site.
+@lru_cache(maxsize=256)
 def is_diagnostics_intent(text: str) -> bool:
     """Detect whether the user is asking for root-cause diagnostics."""
     if not text:
         return False
     lowered = text.lower()
-    has_cause = any(sig in lowered for sig in _CAUSE_SIGNALS)
-    has_metric = any(sig in lowered for sig in _METRIC_SIGNALS)
-    return has_cause and has_metric
+    tokens = frozenset(_WORD_RE.findall(lowered))
+    return _class_match(lowered, tokens, _CAUSE_WORDS, _CAUSE_PHRASES) and _class_match(
+        lowered, tokens, _METRIC_WORDS, _METRIC_PHRASES
+    )
 
 
+@lru_cache(maxsize=256)
 def infer_target_metric(text: str) -> str:
     """Guess which metric class (latency/tokens/both) is being referenced."""
     lowered = (text or "").lower()
-    has_latency = any(keyword in lowered for keyword in _LATENCY_KEYWORDS)
-    has_tokens = any(keyword in lowered for keyword in _TOKEN_KEYWORDS)
+    tokens = frozenset(_WORD_RE.findall(lowered))
+    has_latency = _class_match(lowered, tokens, _LATENCY_WORDS, _LATENCY_PHRASES)
+    has_tokens = _class_match(lowered, tokens, _TOKEN_WORDS)
     if has_latency and has_tokens:
         return "both"
     if has_tokens:
@@ -54,56 +81,70 @@ def infer_target_metric(text: str) -> str:
     return "latency"
 
 
+@lru_cache(maxsize=256)
 def extract_window_hours_from_text(text: str) -> Optional[int]:
     """Parse a timeframe like 'last 3 days' or 'last 24 hours'."""
     if not text:
         return None
-    hour_match = re.search(r"(\d+)\s*(hour|hours)", text, re.IGNORECASE)
+    hour_match = _HOUR_RE.search(text)
     if hour_match:
         return int(hour_match.group(1))
-    day_match = re.search(r"(\d+)\s*(day|days)", text, re.IGNORECASE)
+    day_match = _DAY_RE.search(text)
     if day_match:
         return int(day_match.group(1)) * 24
     return None
 
 
-DIAGNOSTICS_STEP_SPECS: List[Dict[str, Any]] = [
-    {
-        "name": "overall_change",
-        "agent": "metrics_agent",
-        "mode": "overall",
-        "objective_template": (
+class StepSpec(NamedTuple):
+    """Frozen diagnostics plan-step template."""
+
+    name: str
+    agent: str
+    objective_template: str
+    success: str
+    mode: Optional[str] = None
+
+
+# Immutable: the planner expands these on every diagnostics request, and
+# attribute access on a NamedTuple is cheaper than per-field dict lookups
+# (and nothing can accidentally mutate a shared template in place).
+DIAGNOSTICS_STEP_SPECS: Tuple[StepSpec, ...] = (
+    StepSpec(
+        name="overall_change",
+        agent="metrics_agent",
+        mode="overall",
+        objective_template=(
             "Compare the average/max {metric} between the recent {recent_hours} hours "
             "and the previous {baseline_hours} hours."
         ),
-        "success": "Calculate average/max values and call counts for both periods and return as rows",
-    },
-    {
-        "name": "by_tool",
-        "agent": "metrics_agent",
-        "mode": "by_tool",
-        "objective_template": "Compare {metric} average and call count by tool for the two periods.",
-        "success": "Find the top 10 tools with the largest increase.",
-    },
-    {
-        "name": "by_agent",
-        "agent": "metrics_agent",
-        "mode": "by_agent",
-        "objective_template": "Compare {metric} average and call count by agent_name.",
-        "success": "Find agents with the largest increase.",
-    },
-    {
-        "name": "summarize",
-        "agent": "diagnostics_summary_agent",
-        "objective_template": (
+        success="Calculate average/max values and call counts for both periods and return as rows",
+    ),
+    StepSpec(
+        name="by_tool",
+        agent="metrics_agent",
+        mode="by_tool",
+        objective_template="Compare {metric} average and call count by tool for the two periods.",
+        success="Find the top 10 tools with the largest increase.",
+    ),
+    StepSpec(
+        name="by_agent",
+        agent="metrics_agent",
+        mode="by_agent",
+        objective_template="Compare {metric} average and call count by agent_name.",
+        success="Find agents with the largest increase.",
+    ),
+    StepSpec(
+        name="summarize",
+        agent="diagnostics_summary_agent",
+        objective_template=(
             "Summarize the key root cause candidates based on previous steps and suggest simple action items."
         ),
-        "success": "Present 2-3 key causes with supporting numbers",
-    },
-]
+        success="Present 2-3 key causes with supporting numbers",
+    ),
+)
 
 
-SQL_GOAL_TEMPLATES: Dict[str, str] = {
+SQL_GOAL_TEMPLATES: Mapping = MappingProxyType({
     "overall": (
         "Compare the average and maximum {metric} between the last {recent_hours} hours "
         "and the previous {baseline_hours} hours. Return one row per window_label "
@@ -117,9 +158,24 @@ SQL_GOAL_TEMPLATES: Dict[str, str] = {
         "For the same two windows, group by agent_name and compute average {metric} and call_count. "
         "Return agents with the largest increase."
     ),
+})
+
+
+# The planner only ever combines a handful of metric/mode/window values, so
+# both formatters below are effectively lookup tables after the first request.
+_STEP_SPECS_BY_NAME: Dict[str, StepSpec] = {
+    spec.name: spec for spec in DIAGNOSTICS_STEP_SPECS
 }
 
 
+@lru_cache(maxsize=128)
 def build_diagnostics_sql_goal(metric: str, mode: str, baseline_hours: int, recent_hours: int) -> str:
     template = SQL_GOAL_TEMPLATES.get(mode, "")
     return template.format(metric=metric, baseline_hours=baseline_hours, recent_hours=recent_hours)
+
+
+@lru_cache(maxsize=128)
+def format_step_objective(step_name: str, metric: str, baseline_hours: int, recent_hours: int) -> str:
+    """Format a DIAGNOSTICS_STEP_SPECS objective for the given parameters."""
+    template = _STEP_SPECS_BY_NAME[step_name].objective_template
+    return template.format(metric=metric, baseline_hours=baseline_hours, recent_hours=recent_hours)
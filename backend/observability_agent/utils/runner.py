@@ -1,20 +1,76 @@
 """Helper utilities for running the observability agent."""
 
+import asyncio
 from typing import Optional
 from langchain_core.messages import HumanMessage, AIMessage
 
 from ..core.state import ObsState
 
 
-def run_obs_agent(
+def _initial_state(user_message: str, prev_state: Optional[ObsState]) -> ObsState:
+    """Build the graph input state for a new or continued conversation."""
+    if prev_state is None:
+        return {
+            "messages": [HumanMessage(content=user_message)],
+            "active_agent": "router",
+            "last_rows": [],
+            "plan": [],
+            "plan_step_index": 0,
+            "plan_mode": "default",
+            "diagnostics_context": {"results": []},
+            "has_error": False,
+        }
+
+    # Add new user message to previous conversation
+    return {
+        "messages": prev_state["messages"] + [HumanMessage(content=user_message)],
+        "active_agent": prev_state["active_agent"],
+        "last_rows": prev_state.get("last_rows", []),
+        "plan": [],
+        "plan_step_index": 0,
+        "plan_mode": prev_state.get("plan_mode", "default"),
+        "diagnostics_context": prev_state.get("diagnostics_context", {"results": []}),
+        "has_error": False,
+    }
+
+
+def _print_new_messages(messages, printed: int) -> int:
+    """Print agent responses added since the last event; returns new cursor.
+
+    Iterates by index from the cursor instead of slicing: each streamed
+    event carries the full message list, so a per-event slice would make
+    printing quadratic in message count over a long trace.
+    """
+    for i in range(printed, len(messages)):
+        msg = messages[i]
+        if not isinstance(msg, AIMessage):
+            continue
+
+        print("\n=== Agent Response ===")
+        print(msg.content)
+
+        meta = getattr(msg, "additional_kwargs", {})
+        reasoning = meta.get("reasoning")
+        content_text = msg.content if isinstance(msg.content, str) else ""
+        if reasoning and (not content_text or reasoning not in content_text):
+            print(f"\n💡 Reasoning: {reasoning}")
+
+        print("======================")
+
+    return len(messages)
+
+
+async def arun_obs_agent(
     user_message: str,
     app,
     prev_state: Optional[ObsState] = None
 ) -> ObsState:
     """
-    Execution function with multi-turn conversation support.
+    Async execution function with multi-turn conversation support.
 
-    Executes the observability agent with multi-turn conversation support.
+    Drives the graph with astream so async agent nodes (chart, diagnostics
+    summary) run natively on the event loop while sync nodes are dispatched
+    to LangGraph's executor.
     - If prev_state is provided, continues the conversation
     - Otherwise starts a new conversation
 
@@ -30,55 +86,38 @@ def run_obs_agent(
     print(user_message)
     print("============")
 
-    if prev_state is None:
-        state: ObsState = {
-            "messages": [HumanMessage(content=user_message)],
-            "active_agent": "router",
-            "last_rows": [],
-            "plan": [],
-            "plan_step_index": 0,
-            "plan_mode": "default",
-            "diagnostics_context": {"results": []},
-            "has_error": False,
-        }
-    else:
-        # Add new user message to previous conversation
-        state = {
-            "messages": prev_state["messages"] + [HumanMessage(content=user_message)],
-            "active_agent": prev_state["active_agent"],
-            "last_rows": prev_state.get("last_rows", []),
-            "plan": [],
-            "plan_step_index": 0,
-            "plan_mode": prev_state.get("plan_mode", "default"),
-            "diagnostics_context": prev_state.get("diagnostics_context", {"results": []}),
-            "has_error": False,
-        }
+    state = _initial_state(user_message, prev_state)
 
     final_state: Optional[ObsState] = None
     printed = len(state["messages"])
 
-    for event in app.stream(state, stream_mode="values"):
+    async for event in app.astream(state, stream_mode="values"):
         final_state = event
         messages = event["messages"]
         if not messages:
             continue
+        printed = _print_new_messages(messages, printed)
 
-        new_messages = messages[printed:]
-        printed = len(messages)
+    return final_state or state
 
-        for msg in new_messages:
-            if not isinstance(msg, AIMessage):
-                continue
 
-            print("\n=== Agent Response ===")
-            print(msg.content)
+def run_obs_agent(
+    user_message: str,
+    app,
+    prev_state: Optional[ObsState] = None
+) -> ObsState:
+    """
+    Execution function with multi-turn conversation support.
 
-            meta = getattr(msg, "additional_kwargs", {})
-            reasoning = meta.get("reasoning")
-            content_text = msg.content if isinstance(msg.content, str) else ""
-            if reasoning and (not content_text or reasoning not in content_text):
-                print(f"\n💡 Reasoning: {reasoning}")
+    Synchronous wrapper around arun_obs_agent for scripts and examples;
+    callers already inside an event loop should await arun_obs_agent instead.
 
-            print("======================")
+    Args:
+        user_message: User's input message
+        app: Compiled LangGraph application
+        prev_state: Previous conversation state (optional)
 
-    return final_state or state
+    Returns:
+        Final state after processing the message
+    """
+    return asyncio.run(arun_obs_agent(user_message, app, prev_state=prev_state))